@@ -9,10 +9,21 @@ import os
 import time
 import logging
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from types import MappingProxyType
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Mapping, Tuple, Union
+
+# Начало эпохи UNIX (наивный datetime в UTC)
+_EPOCH = datetime(1970, 1, 1)
+
+# Секреты Google Colab, которые читает фреймворк
+_COLAB_SECRET_NAMES = ('binance_api_key', 'binance_api_secret')
+# Неизменяемый снимок значений _COLAB_SECRET_NAMES (None — секрет не найден или недоступен);
+# создается при первом обращении к секретам
+_COLAB_SECRETS: Optional[Mapping[str, Optional[str]]] = None
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -22,6 +33,76 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+def _datetime_to_ms(value: datetime) -> int:
+    """
+    Преобразует datetime в UNIX timestamp в миллисекундах. Наивный datetime считается UTC (как timestamp
+    в данных Binance и в БД), datetime с часовым поясом предварительно переводится в UTC.
+
+    Args:
+        value: Дата и время
+
+    Returns:
+        int: UNIX timestamp в миллисекундах
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    # Целочисленная арифметика вместо value.timestamp(): наивный datetime не трактуется как локальное время
+    delta = value - _EPOCH
+    return delta.days * 86400000 + delta.seconds * 1000 + delta.microseconds // 1000
+
+@lru_cache(maxsize=1)
+def _is_colab() -> bool:
+    """
+    Проверяет, выполняется ли код в Google Colab; результат кэшируется на время процесса.
+    Colab задает переменную окружения COLAB_RELEASE_TAG (COLAB_GPU — только в средах с GPU), поэтому обычно
+    хватает проверки окружения; оболочка IPython проверяется, только если этих переменных нет.
+
+    Returns:
+        bool: True, если код выполняется в Google Colab
+    """
+    if 'COLAB_RELEASE_TAG' in os.environ or 'COLAB_GPU' in os.environ:
+        return True
+    try:
+        from IPython import get_ipython
+    except ImportError:
+        return False
+    return 'google.colab' in str(get_ipython())
+
+def _get_colab_secret(name: str) -> Optional[str]:
+    """
+    Возвращает секрет Google Colab по имени. userdata.get — обращение к среде Colab, поэтому при первом вызове
+    все секреты _COLAB_SECRET_NAMES читаются за один проход в неизменяемый снимок, а дальше значения берутся
+    из него; повторное создание клиента секреты не запрашивает. ImportError (код выполняется не в Colab)
+    пробрасывается вызывающему.
+
+    Args:
+        name: Имя секрета
+
+    Returns:
+        Optional[str]: Значение секрета или None, если он не найден или недоступен
+    """
+    global _COLAB_SECRETS
+    if _COLAB_SECRETS is None:
+        from google.colab import userdata
+        values = {}
+        for secret_name in _COLAB_SECRET_NAMES:
+            # Отсутствие одного секрета не мешает прочитать остальные
+            try:
+                values[secret_name] = userdata.get(secret_name)
+            except Exception as e:
+                logger.warning("Ошибка при получении секрета '%s' из секретов Colab: %s", secret_name, e)
+                values[secret_name] = None
+        _COLAB_SECRETS = MappingProxyType(values)
+    return _COLAB_SECRETS.get(name)
+
+def clear_colab_secret_cache() -> None:
+    """
+    Сбрасывает снимок секретов Google Colab, например после добавления секрета или выдачи ноутбуку доступа к нему:
+    при следующем обращении секреты будут прочитаны заново.
+    """
+    global _COLAB_SECRETS
+    _COLAB_SECRETS = None
+
 class BinanceUSClient:
     """
     Класс для подключения к Binance US API и загрузки исторических данных.
@@ -58,9 +139,7 @@ class BinanceUSClient:
         и код выполняется в среде Colab.
         """
         # Проверка, выполняется ли код в среде Google Colab
-        is_colab = 'COLAB_GPU' in os.environ or 'google.colab' in str(get_ipython())
-        
-        if not is_colab:
+        if not _is_colab():
             logger.debug("Код не выполняется в среде Google Colab, пропуск загрузки секретов")
             return
         
@@ -69,38 +148,29 @@ class BinanceUSClient:
             logger.info("Попытка загрузки недостающих ключей из секретов Google Colab")
             
             try:
-                # Импортируем модуль userdata из google.colab
-                from google.colab import userdata
-                
-                # Загрузка API ключа, если он не был предоставлен
+                # Загрузка API ключа, если он не был предоставлен (значения секретов кэшируются)
                 if self._api_key is None:
-                    try:
-                        colab_api_key = userdata.get('binance_api_key')
-                        if colab_api_key:
-                            self._api_key = colab_api_key
-                            logger.info("API ключ успешно загружен из секретов Colab")
-                        else:
-                            logger.warning("Секрет 'binance_api_key' не найден в Colab")
-                    except Exception as e:
-                        logger.warning(f"Ошибка при получении API ключа из секретов Colab: {e}")
+                    colab_api_key = _get_colab_secret('binance_api_key')
+                    if colab_api_key:
+                        self._api_key = colab_api_key
+                        logger.info("API ключ успешно загружен из секретов Colab")
+                    else:
+                        logger.warning("Секрет 'binance_api_key' не найден в Colab")
                 
                 # Загрузка API секрета, если он не был предоставлен
                 if self._api_secret is None:
-                    try:
-                        colab_api_secret = userdata.get('binance_api_secret')
-                        if colab_api_secret:
-                            self._api_secret = colab_api_secret
-                            logger.info("API секрет успешно загружен из секретов Colab")
-                        else:
-                            logger.warning("Секрет 'binance_api_secret' не найден в Colab")
-                    except Exception as e:
-                        logger.warning(f"Ошибка при получении API секрета из секретов Colab: {e}")
+                    colab_api_secret = _get_colab_secret('binance_api_secret')
+                    if colab_api_secret:
+                        self._api_secret = colab_api_secret
+                        logger.info("API секрет успешно загружен из секретов Colab")
+                    else:
+                        logger.warning("Секрет 'binance_api_secret' не найден в Colab")
                         
             except ImportError:
                 logger.warning("Не удалось импортировать google.colab.userdata. "
                              "Возможно, код выполняется в другой среде или требуется обновление Colab.")
             except Exception as e:
-                logger.warning(f"Непредвиденная ошибка при загрузке секретов из Colab: {e}")
+                logger.warning("Непредвиденная ошибка при загрузке секретов из Colab: %s", e)
     
     @property
     def api_key(self):
@@ -125,10 +195,10 @@ class BinanceUSClient:
             self.client.ping()
             return True
         except BinanceAPIException as e:
-            logger.error(f"Ошибка подключения к Binance US API: {e}")
+            logger.error("Ошибка подключения к Binance US API: %s", e)
             return False
         except Exception as e:
-            logger.error(f"Непредвиденная ошибка при подключении: {e}")
+            logger.error("Непредвиденная ошибка при подключении: %s", e)
             return False
     
     def get_client(self) -> Optional[Client]:
@@ -157,10 +227,10 @@ class BinanceUSClient:
             exchange_info = client.get_exchange_info()
             return exchange_info
         except BinanceAPIException as e:
-            logger.error(f"Ошибка получения информации о бирже: {e}")
+            logger.error("Ошибка получения информации о бирже: %s", e)
             return {}
         except Exception as e:
-            logger.error(f"Непредвиденная ошибка: {e}")
+            logger.error("Непредвиденная ошибка: %s", e)
             return {}
     
     def get_usdt_trading_pairs(self) -> List[str]:
@@ -181,7 +251,7 @@ class BinanceUSClient:
             ]
             return sorted(usdt_pairs)
         except Exception as e:
-            logger.error(f"Ошибка при получении USDT пар: {e}")
+            logger.error("Ошибка при получении USDT пар: %s", e)
             return []
     
     def get_available_intervals(self) -> List[str]:
@@ -195,7 +265,7 @@ class BinanceUSClient:
     
     def _convert_timestamp_to_datetime(self, timestamp: int) -> datetime:
         """
-        Конвертирует timestamp в объект datetime.
+        Конвертирует timestamp в наивный объект datetime в UTC (как timestamp в DataFrame и в БД).
         
         Args:
             timestamp: UNIX timestamp в миллисекундах
@@ -203,14 +273,15 @@ class BinanceUSClient:
         Returns:
             datetime: Объект datetime
         """
-        return datetime.fromtimestamp(timestamp / 1000)
+        # fromtimestamp без tz дает локальное время (поиск часового пояса и сдвиги при переходе на летнее время)
+        return _EPOCH + timedelta(milliseconds=timestamp)
     
     def get_historical_data(
         self, 
         symbol: str, 
         interval: str, 
-        start_date: datetime, 
-        end_date: datetime
+        start_date: Union[datetime, int], 
+        end_date: Union[datetime, int]
     ) -> pd.DataFrame:
         """
         Получает исторические данные для указанного символа и интервала в заданном периоде.
@@ -218,8 +289,8 @@ class BinanceUSClient:
         Args:
             symbol: Торговая пара (например, 'BTCUSDT')
             interval: Таймфрейм (например, '1h')
-            start_date: Дата начала периода
-            end_date: Дата окончания периода
+            start_date: Дата начала периода (datetime или UNIX timestamp в миллисекундах)
+            end_date: Дата окончания периода (datetime или UNIX timestamp в миллисекундах)
             
         Returns:
             pd.DataFrame: DataFrame с историческими данными OHLCV
@@ -229,11 +300,11 @@ class BinanceUSClient:
             if not client:
                 return pd.DataFrame()
             
-            # Конвертация datetime в строковые метки времени
-            start_str = int(start_date.timestamp() * 1000)
-            end_str = int(end_date.timestamp() * 1000)
+            # Конвертация datetime (наивный — UTC) в метки времени (миллисекунды передаются как есть)
+            start_str = start_date if isinstance(start_date, int) else _datetime_to_ms(start_date)
+            end_str = end_date if isinstance(end_date, int) else _datetime_to_ms(end_date)
             
-            logger.info(f"Загрузка данных для {symbol} на таймфрейме {interval} с {start_date} по {end_date}...")
+            logger.info("Загрузка данных для %s на таймфрейме %s с %s по %s...", symbol, interval, start_date, end_date)
             
             # Инициализация пустого списка для хранения всех свечей
             all_klines = []
@@ -271,18 +342,18 @@ class BinanceUSClient:
                     time.sleep(0.1)
                 except BinanceAPIException as e:
                     if 'Too much request weight used' in str(e):
-                        logger.warning(f"Превышен лимит запросов, ожидание 60 секунд...")
+                        logger.warning("Превышен лимит запросов, ожидание 60 секунд...")
                         time.sleep(60)
                         continue
                     else:
-                        logger.error(f"Ошибка API Binance при загрузке данных: {e}")
+                        logger.error("Ошибка API Binance при загрузке данных: %s", e)
                         break
                 except Exception as e:
-                    logger.error(f"Непредвиденная ошибка при загрузке данных: {e}")
+                    logger.error("Непредвиденная ошибка при загрузке данных: %s", e)
                     break
             
             if not all_klines:
-                logger.info(f"Данные не найдены для {symbol} на таймфрейме {interval} в указанном периоде")
+                logger.info("Данные не найдены для %s на таймфрейме %s в указанном периоде", symbol, interval)
                 return pd.DataFrame()
             
             # Преобразование данных в pandas DataFrame
@@ -309,13 +380,13 @@ class BinanceUSClient:
             # Оставляем только нужные колонки: OHLCV
             df = df[['open', 'high', 'low', 'close', 'volume']]
             
-            logger.info(f"Загружено {len(df)} свечей для {symbol} на таймфрейме {interval}")
+            logger.info("Загружено %s свечей для %s на таймфрейме %s", len(df), symbol, interval)
             
             return df
             
         except BinanceAPIException as e:
-            logger.error(f"Ошибка API Binance: {e}")
+            logger.error("Ошибка API Binance: %s", e)
             return pd.DataFrame()
         except Exception as e:
-            logger.error(f"Непредвиденная ошибка: {e}")
+            logger.error("Непредвиденная ошибка: %s", e)
             return pd.DataFrame()
\ No newline at end of file
@@ -5,6 +5,12 @@
 Модуль для создания интерактивного интерфейса в Google Colab.
 """
 
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import ipywidgets as widgets
 from IPython.display import display, clear_output
@@ -13,9 +19,69 @@ import matplotlib.pyplot as plt
 from typing import Optional, List, Dict, Any, Tuple, Union
 import os
 
-from binance_data_framework.api_connector import BinanceUSClient
+from binance_data_framework.api_connector import BinanceUSClient, _datetime_to_ms
 from binance_data_framework.database_handler import GoogleDriveDataManager
 
+# Binance US ограничивает вес запросов (~1200 в минуту), поэтому параллельных загрузок из API немного
+_API_MAX_WORKERS = 2
+
+# Правила ресемплирования pandas для таймфреймов Binance
+_RESAMPLE_RULES = {
+    '1m': '1min',
+    '3m': '3min',
+    '5m': '5min',
+    '15m': '15min',
+    '30m': '30min',
+    '1h': '1H',
+    '2h': '2H',
+    '4h': '4H',
+    '6h': '6H',
+    '8h': '8H',
+    '12h': '12H',
+    '1d': '1D',
+    '3d': '3D',
+    '1w': '1W',
+    '1M': '1M'
+}
+
+
+def _to_ms(value: Union[datetime, int]) -> int:
+    """
+    Возвращает границу периода в миллисекундах; datetime без часового пояса считается UTC
+    (как в данных Binance и в БД).
+    """
+    return value if isinstance(value, int) else _datetime_to_ms(value)
+
+
+def _to_datetime(value: Union[datetime, int]) -> datetime:
+    """
+    Возвращает границу периода как datetime (миллисекунды трактуются как UTC).
+    """
+    return pd.Timestamp(value, unit='ms').to_pydatetime() if isinstance(value, int) else value
+
+
+# Общие layout-объекты: создаются один раз и переиспользуются всеми виджетами
+_L_COL = widgets.Layout(width='280px', margin='0 0 8px 0')
+_L_BTN = widgets.Layout(width='280px', margin='5px 0')
+_L_AUTO = widgets.Layout(width='auto')
+_L_AREA = widgets.Layout(width='auto', padding='10px', align_items='flex-start')
+_L_RIGHT_COLUMN = widgets.Layout(width='420px', padding='10px', align_items='flex-start')
+_L_LOCAL_LIST = widgets.Layout(width='100%', min_width='480px', margin='0 0 10px 0')
+_L_LOCAL_BTN = widgets.Layout(width='auto', margin='0 5px 0 0')
+_L_CONFIRM = widgets.Layout(margin='5px 0')
+
+# Кэш списка торговых пар и таймфреймов на диске, чтобы не запрашивать биржу при каждом запуске UI
+_METADATA_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'binance_framework', 'exchange_info.json')
+_METADATA_CACHE_TTL = 24 * 60 * 60
+_METADATA_CACHE_VERSION = 1
+
+# Размер порции строк при экспорте в CSV: ограничивает пиковое потребление памяти
+_CSV_CHUNK_ROWS = 100_000
+
+# Тип рядов, передаваемых в matplotlib: для графика точности float32 достаточно, а объем данных вдвое меньше.
+# Сами DataFrame (ресемплирование, экспорт) остаются во float64, как в БД
+_PLOT_DTYPE = 'float32'
+
 
 class DataDownloaderUI:
     """
@@ -34,6 +100,12 @@ class DataDownloaderUI:
         self.db_manager = db_manager
         self.last_loaded_data_params = {}
         
+        # Фоновый цикл asyncio (в Colab основной поток занят циклом ядра) и пулы потоков:
+        # все обращения к БД идут последовательно через один поток, загрузки из API - параллельно
+        self._loop = None
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bdf-db')
+        self._api_executor = ThreadPoolExecutor(max_workers=_API_MAX_WORKERS, thread_name_prefix='bdf-api')
+        
         # Инициализация виджетов
         self.symbols = []
         self.timeframes = []
@@ -43,18 +115,64 @@ class DataDownloaderUI:
     def _fetch_initial_data(self) -> None:
         """
         Получает список доступных USDT-пар и таймфреймов.
+        Сначала использует кэш на диске, если он не старше _METADATA_CACHE_TTL.
         """
+        cached = self._load_cached_metadata()
+        if cached:
+            self.symbols, self.timeframes = cached
+            return
+        
         # Получаем список USDT-пар
         self.symbols = self.api_client.get_usdt_trading_pairs()
+        symbols_loaded = bool(self.symbols)
         if not self.symbols:
             self.symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "ADAUSDT", "XRPUSDT"]  # Значения по умолчанию
             print("Не удалось получить список торговых пар. Используем значения по умолчанию.")
         
         # Получаем список таймфреймов
         self.timeframes = self.api_client.get_available_intervals()
+        timeframes_loaded = bool(self.timeframes)
         if not self.timeframes:
             self.timeframes = ["1m", "5m", "15m", "1h", "4h", "1d"]  # Значения по умолчанию
             print("Не удалось получить список таймфреймов. Используем значения по умолчанию.")
+        
+        # Значения по умолчанию в кэш не попадают
+        if symbols_loaded and timeframes_loaded:
+            self._save_cached_metadata(self.symbols, self.timeframes)
+    
+    def _load_cached_metadata(self) -> Optional[Tuple[List[str], List[str]]]:
+        """
+        Загружает список торговых пар и таймфреймов из кэша на диске.
+        
+        Returns:
+            Optional[Tuple[List[str], List[str]]]: (symbols, timeframes), либо None, если кэш
+            отсутствует, устарел или записан другой версией фреймворка
+        """
+        try:
+            if time.time() - os.path.getmtime(_METADATA_CACHE_PATH) >= _METADATA_CACHE_TTL:
+                return None
+            with open(_METADATA_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') != _METADATA_CACHE_VERSION:
+                return None
+            if not cached.get('symbols') or not cached.get('timeframes'):
+                return None
+            return cached['symbols'], cached['timeframes']
+        except (OSError, ValueError, AttributeError):
+            return None
+    
+    def _save_cached_metadata(self, symbols: List[str], timeframes: List[str]) -> None:
+        """
+        Атомарно сохраняет список торговых пар и таймфреймов в кэш на диске.
+        """
+        cache_dir = os.path.dirname(_METADATA_CACHE_PATH)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=cache_dir, suffix='.tmp', delete=False) as f:
+                json.dump({'version': _METADATA_CACHE_VERSION, 'symbols': symbols, 'timeframes': timeframes}, f)
+            os.replace(f.name, _METADATA_CACHE_PATH)
+        except OSError as e:
+            print(f"Не удалось сохранить кэш списка торговых пар: {e}")
     
     def _create_widgets(self) -> None:
         """
@@ -65,82 +183,70 @@ class DataDownloaderUI:
             value='',
             description='Фильтр символов:',
             style={'description_width': 'initial'},
-            layout=widgets.Layout(width='100%')
+            layout=_L_COL
         )
-        self.select_all_symbols_checkbox = widgets.Checkbox(
-            value=False,
-            description='Выбрать/Снять все видимые символы',
-            indent=False
-        )
-        self.symbol_checkboxes_container = widgets.VBox(
-            [],
-            layout=widgets.Layout(
-                max_height='300px',
-                overflow_y='auto',
-                border='1px solid lightgray',
-                padding='5px',
-                width='100%'
-            )
+        # Единый виджет множественного выбора вместо отдельного чекбокса на каждый символ
+        self.symbol_select = widgets.SelectMultiple(
+            options=self.symbols,
+            value=[],
+            rows=12,
+            layout=_L_COL
         )
-        # Словарь всех чекбоксов для символов
-        self.all_symbol_checkbox_widgets = {
-            symbol: widgets.Checkbox(
-                description=symbol,
-                value=False,
-                indent=False,
-                layout=widgets.Layout(width='auto')
-            ) for symbol in self.symbols
-        }
         # --- Таймфрейм и остальные виджеты ---
         self.timeframe_dropdown = widgets.Dropdown(
             options=self.timeframes,
             value='1h',
             description='Таймфрейм:',
             style={'description_width': 'initial'},
-            layout=widgets.Layout(width='50%')
+            layout=_L_COL
         )
         end_date = datetime.now()
         start_date = end_date - timedelta(days=30)
         self.start_date_picker = widgets.DatePicker(
             description='Дата начала:',
             value=start_date.date(),
-            style={'description_width': 'initial'}
+            style={'description_width': 'initial'},
+            layout=_L_COL
         )
         self.end_date_picker = widgets.DatePicker(
             description='Дата конца:',
             value=end_date.date(),
-            style={'description_width': 'initial'}
+            style={'description_width': 'initial'},
+            layout=_L_COL
         )
         self.use_resample_checkbox = widgets.Checkbox(
             value=False,
             description='Ресемплировать из мин. таймфрейма',
             indent=False,
-            layout=widgets.Layout(width='50%')
+            layout=_L_COL
         )
         self.load_button = widgets.Button(
             description='Загрузить данные',
             button_style='primary',
-            icon='download'
+            icon='download',
+            layout=_L_BTN
         )
         self.show_local_button = widgets.Button(
             description='Данные на Диске',
             button_style='info',
-            icon='cloud-download'
+            icon='cloud-download',
+            layout=_L_BTN
         )
         self.plot_checkbox = widgets.Checkbox(
             value=False,
             description='Показать график',
-            indent=False
+            indent=False,
+            layout=_L_COL
         )
         self.output = widgets.Output()
         # --- Виджеты для удаления данных ---
-        self.delete_symbol_input = widgets.Text(description='Символ для удаления:', layout=widgets.Layout(width='auto'))
-        self.delete_timeframe_input = widgets.Text(description='Таймфрейм для удаления:', layout=widgets.Layout(width='auto'))
+        self.delete_symbol_input = widgets.Text(description='Символ для удаления:', layout=_L_AUTO)
+        self.delete_timeframe_input = widgets.Text(description='Таймфрейм для удаления:', layout=_L_AUTO)
         self.confirm_delete_checkbox = widgets.Checkbox(description='Я подтверждаю удаление этих данных', value=False, indent=False)
         self.delete_data_button = widgets.Button(description='Удалить данные из БД', button_style='danger', icon='trash')
         self.delete_data_button.on_click(self._on_delete_data_button_clicked)
         # --- Виджеты для экспорта данных ---
-        self.export_format_dropdown = widgets.Dropdown(options=['CSV', 'Parquet'], value='CSV', description='Формат экспорта:', layout=widgets.Layout(width='auto'))
+        self.export_format_dropdown = widgets.Dropdown(options=['CSV', 'Parquet'], value='CSV', description='Формат экспорта:', layout=_L_AUTO)
         # Не добавляем self.export_data_button в интерфейс, но оставляем инициализацию для обратной совместимости
         # self.export_data_button = widgets.Button(description='Экспортировать загруженные данные', button_style='success', icon='save')
         # self.export_data_button.on_click(self._on_export_data_button_clicked)
@@ -152,56 +258,31 @@ class DataDownloaderUI:
             description='Прогресс:',
             bar_style='info',
             orientation='horizontal',
+            # Собственный layout: его видимость переключается во время загрузки
             layout=widgets.Layout(width='280px', height='16px', margin='5px 0', visibility='hidden')
         )
         # --- Привязка обработчиков ---
         self.load_button.on_click(self._on_load_button_clicked)
         self.show_local_button.on_click(self._on_show_local_button_clicked)
-        self.symbol_filter_input.observe(self._update_visible_symbol_checkboxes, names='value')
-        self.select_all_symbols_checkbox.observe(self._on_select_all_toggled, names='value')
-        # --- Инициализация видимых чекбоксов ---
-        self._update_visible_symbol_checkboxes()
-
-        # Обновление layout для компактности и двухколоночного вида
-        self.timeframe_dropdown.layout = widgets.Layout(width='280px', margin='0 0 8px 0')
-        self.symbol_filter_input.layout = widgets.Layout(width='280px', margin='0 0 8px 0')
-        self.select_all_symbols_checkbox.layout = widgets.Layout(width='280px', margin='0 0 5px 0')
-        self.symbol_checkboxes_container.layout = widgets.Layout(
-            width='280px', max_height='250px', overflow_y='auto', border='1px solid lightgray', padding='5px', margin='0 0 8px 0')
-        self.start_date_picker.layout = widgets.Layout(width='280px', margin='0 0 8px 0')
-        self.end_date_picker.layout = widgets.Layout(width='280px', margin='0 0 8px 0')
-        self.use_resample_checkbox.layout = widgets.Layout(width='280px', margin='0 0 8px 0')
-        self.plot_checkbox.layout = widgets.Layout(width='280px', margin='0 0 8px 0')
-        self.load_button.layout = widgets.Layout(width='280px', margin='5px 0')
-        self.show_local_button.layout = widgets.Layout(width='280px', margin='5px 0')
-        # self.export_data_button.layout = widgets.Layout(width='280px', margin='5px 0')
+        self.symbol_filter_input.observe(self._update_visible_symbols, names='value')
+
         # Для правой колонки (локальные данные)
-        self.local_data_management_area = widgets.VBox([], layout=widgets.Layout(width='auto', padding='10px', align_items='flex-start'))
+        self.local_data_management_area = widgets.VBox([], layout=_L_AREA)
 
-    def _update_visible_symbol_checkboxes(self, change=None):
+    def _update_visible_symbols(self, change=None):
         """
-        Обновляет список видимых чекбоксов символов согласно фильтру.
+        Сужает список символов согласно фильтру, сохраняя ранее выбранные значения.
         """
         filter_text = self.symbol_filter_input.value.strip().lower()
-        visible_checkboxes = []
-        for symbol, cb_widget in self.all_symbol_checkbox_widgets.items():
-            if not filter_text or filter_text in symbol.lower():
-                visible_checkboxes.append(cb_widget)
-        self.symbol_checkboxes_container.children = tuple(visible_checkboxes)
-
-    def _on_select_all_toggled(self, change):
-        """
-        Обработчик для чекбокса "выбрать/снять все видимые символы".
-        """
-        new_value = self.select_all_symbols_checkbox.value
-        for cb_widget in self.symbol_checkboxes_container.children:
-            cb_widget.value = new_value
+        selected = self.symbol_select.value
+        self.symbol_select.options = tuple(
+            symbol for symbol in self.symbols
+            if not filter_text or filter_text in symbol.lower() or symbol in selected
+        )
+        self.symbol_select.value = selected
 
     def _on_load_button_clicked(self, button: widgets.Button) -> None:
-        selected_symbols = [
-            symbol for symbol, cb_widget in self.all_symbol_checkbox_widgets.items()
-            if cb_widget.value
-        ]
+        selected_symbols = list(self.symbol_select.value)
         with self.output:
             clear_output(wait=True)
             num_symbols = len(selected_symbols)
@@ -217,30 +298,30 @@ class DataDownloaderUI:
             timeframe = self.timeframe_dropdown.value
             start_date = datetime.combine(self.start_date_picker.value, datetime.min.time())
             end_date = datetime.combine(self.end_date_picker.value, datetime.max.time())
+            # Границы переводятся в миллисекунды UTC один раз и передаются дальше как int
+            start_ms, end_ms = _to_ms(start_date), _to_ms(end_date)
             use_resample = self.use_resample_checkbox.value
             plot_data = self.plot_checkbox.value
-            if end_date < start_date:
+            if end_ms < start_ms:
                 print("Ошибка: Дата окончания должна быть позже даты начала")
                 self.progress_bar.layout.visibility = 'hidden'
                 return
             loaded_dataframes = {}
             summary = []
-            for idx, symbol in enumerate(selected_symbols):
-                try:
-                    if use_resample and timeframe != '1m':
-                        df = self._get_resampled_data(symbol, timeframe, start_date, end_date)
-                    else:
-                        df = self._get_data(symbol, timeframe, start_date, end_date)
-                    if df is not None and not df.empty:
-                        loaded_dataframes[symbol] = df
-                        summary.append(f"{symbol} — {len(df)} строк")
-                        if plot_data:
-                            self._plot_data(df, symbol, timeframe)
-                    else:
-                        summary.append(f"{symbol} — нет данных")
-                except Exception as e:
-                    summary.append(f"{symbol} — ошибка: {e}")
-                self.progress_bar.value = (idx + 1) / num_symbols
+            results = self._run_async(
+                self._load_symbols_async(selected_symbols, timeframe, start_ms, end_ms, use_resample)
+            )
+            for symbol in selected_symbols:
+                df = results[symbol]
+                if isinstance(df, Exception):
+                    summary.append(f"{symbol} — ошибка: {df}")
+                elif df is not None and not df.empty:
+                    loaded_dataframes[symbol] = df
+                    summary.append(f"{symbol} — {len(df)} строк")
+                    if plot_data:
+                        self._plot_data(df, symbol, timeframe)
+                else:
+                    summary.append(f"{symbol} — нет данных")
             self.progress_bar.layout.visibility = 'hidden'
             if loaded_dataframes:
                 self.last_loaded_data_params = {
@@ -292,13 +373,22 @@ class DataDownloaderUI:
                 filepath = os.path.join(exports_dir, filename)
                 try:
                     if export_format == 'CSV':
-                        df.to_csv(filepath, index=True)
+                        self._write_csv(df, filepath)
                     elif export_format == 'Parquet':
                         df.to_parquet(filepath, index=True)
                     print(f"Экспортировано: {filepath}")
                 except Exception as e:
                     print(f"Ошибка экспорта {symbol}: {e}")
 
+    @staticmethod
+    def _write_csv(df: pd.DataFrame, filepath: str) -> None:
+        """
+        Записывает DataFrame в CSV порциями через буферизованный файл,
+        не формируя весь текст файла в памяти.
+        """
+        with open(filepath, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+            df.to_csv(f, index=True, chunksize=_CSV_CHUNK_ROWS)
+
     def display(self) -> None:
         clear_output(wait=True)
         # Левая колонка: загрузка новых данных
@@ -306,8 +396,7 @@ class DataDownloaderUI:
             widgets.HTML("<h4>Параметры загрузки:</h4>"),
             self.timeframe_dropdown,
             self.symbol_filter_input,
-            self.select_all_symbols_checkbox,
-            self.symbol_checkboxes_container,
+            self.symbol_select,
             widgets.HTML("<h4>Период и опции:</h4>"),
             self.start_date_picker,
             self.end_date_picker,
@@ -315,15 +404,15 @@ class DataDownloaderUI:
             self.plot_checkbox,
             self.load_button,
             self.progress_bar
-        ], layout=widgets.Layout(width='auto', padding='10px', align_items='flex-start'))
+        ], layout=_L_AREA)
 
         # Правая колонка: управление локальными данными (заполняется динамически)
         if not hasattr(self, 'local_data_management_area'):
-            self.local_data_management_area = widgets.VBox([], layout=widgets.Layout(width='auto', padding='10px', align_items='flex-start'))
+            self.local_data_management_area = widgets.VBox([], layout=_L_AREA)
 
         right_column = widgets.VBox([
             self.local_data_management_area
-        ], layout=widgets.Layout(width='420px', padding='10px', align_items='flex-start'))
+        ], layout=_L_RIGHT_COLUMN)
 
         main_controls_layout = widgets.HBox([
             left_column,
@@ -340,12 +429,58 @@ class DataDownloaderUI:
         # Автоматически загружаем данные при открытии UI
         self._on_show_local_button_clicked(None)
 
+    def _ensure_event_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Запускает (при первом обращении) фоновый цикл asyncio в отдельном потоке.
+        """
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        return self._loop
+
+    def _run_async(self, coro) -> Any:
+        """
+        Выполняет корутину в фоновом цикле и дожидается ее результата.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_event_loop()).result()
+
+    async def _load_symbols_async(
+        self,
+        symbols: List[str],
+        timeframe: str,
+        start_date: Union[datetime, int],
+        end_date: Union[datetime, int],
+        use_resample: bool
+    ) -> Dict[str, Any]:
+        """
+        Загружает данные по всем символам одновременно: пока один символ скачивается из API,
+        другой читается или сохраняется в БД на Google Drive.
+        
+        Returns:
+            Dict[str, Any]: DataFrame (или None) либо исключение для каждого символа
+        """
+        num_symbols = len(symbols)
+        completed = 0
+
+        async def load(symbol: str) -> Optional[pd.DataFrame]:
+            nonlocal completed
+            try:
+                if use_resample and timeframe != '1m':
+                    return await self._get_resampled_data_async(symbol, timeframe, start_date, end_date)
+                return await self._get_data_async(symbol, timeframe, start_date, end_date)
+            finally:
+                completed += 1
+                self.progress_bar.value = completed / num_symbols
+
+        results = await asyncio.gather(*(load(symbol) for symbol in symbols), return_exceptions=True)
+        return dict(zip(symbols, results))
+
     def _get_data(
         self, 
         symbol: str, 
         timeframe: str, 
-        start_date: datetime, 
-        end_date: datetime
+        start_date: Union[datetime, int], 
+        end_date: Union[datetime, int]
     ) -> Optional[pd.DataFrame]:
         """
         Получает данные из БД на Google Drive или API.
@@ -353,30 +488,68 @@ class DataDownloaderUI:
         Args:
             symbol: Торговая пара
             timeframe: Таймфрейм
-            start_date: Дата начала периода
-            end_date: Дата окончания периода
+            start_date: Дата начала периода (datetime или миллисекунды UTC)
+            end_date: Дата окончания периода (datetime или миллисекунды UTC)
             
         Returns:
             pd.DataFrame: DataFrame с данными или None в случае ошибки
         """
-        data_exists, date_range = self.db_manager.check_data_exists(symbol, timeframe, start_date, end_date)
-        if data_exists:
+        return self._run_async(self._get_data_async(symbol, timeframe, start_date, end_date))
+
+    async def _get_data_async(
+        self, 
+        symbol: str, 
+        timeframe: str, 
+        start_date: Union[datetime, int], 
+        end_date: Union[datetime, int]
+    ) -> Optional[pd.DataFrame]:
+        """
+        Асинхронный вариант _get_data: обращения к БД выполняются в потоке БД,
+        загрузка из API - в пуле потоков API, не блокируя остальные символы.
+        Из API загружаются только диапазоны, которых нет в БД.
+        """
+        loop = asyncio.get_running_loop()
+        missing_ranges = await loop.run_in_executor(
+            self._db_executor, self.db_manager.get_missing_ranges, symbol, timeframe, start_date, end_date
+        )
+        if not missing_ranges:
             print(f"Данные найдены в БД для {symbol} {timeframe}")
-            df = self.db_manager.get_data(symbol, timeframe, start_date, end_date)
-            return df
-        print(f"Загрузка из API: {symbol} {timeframe}")
-        df = self.api_client.get_historical_data(symbol, timeframe, start_date, end_date)
-        if df is not None and not df.empty:
+            return await loop.run_in_executor(
+                self._db_executor, self.db_manager.get_data, symbol, timeframe, start_date, end_date
+            )
+        # Из API загружаются только недостающие диапазоны
+        api_chunks = []
+        for range_start, range_end in missing_ranges:
+            print(f"Загрузка из API: {symbol} {timeframe} с {_to_datetime(range_start)} по {_to_datetime(range_end)}")
+            chunk = await loop.run_in_executor(
+                self._api_executor, self.api_client.get_historical_data, symbol, timeframe, range_start, range_end
+            )
+            if chunk is not None and not chunk.empty:
+                api_chunks.append(chunk)
+        df = pd.concat(api_chunks) if len(api_chunks) > 1 else (api_chunks[0] if api_chunks else pd.DataFrame())
+        if not df.empty:
+            # Из API загружены только диапазоны, которых нет в БД, поэтому они сохраняются всегда
             print("Сохранение в БД...")
-            self.db_manager.save_data(df, symbol, timeframe)
-        return df
+            await loop.run_in_executor(self._db_executor, self.db_manager.save_data, df, symbol, timeframe)
+        if missing_ranges == [(start_date, end_date)]:
+            return df
+        period = slice(pd.Timestamp(_to_ms(start_date), unit='ms'), pd.Timestamp(_to_ms(end_date), unit='ms'))
+        # Часть периода уже есть в БД: объединяем ее с загруженными диапазонами
+        local_df = await loop.run_in_executor(
+            self._db_executor, self.db_manager.get_data, symbol, timeframe, start_date, end_date
+        )
+        if local_df is None or local_df.empty:
+            return df.loc[period] if not df.empty else df
+        combined = pd.concat([local_df[['open', 'high', 'low', 'close', 'volume']], df]).sort_index()
+        combined = combined[~combined.index.duplicated(keep='last')]
+        return combined.loc[period]
 
     def _get_resampled_data(
         self, 
         symbol: str, 
         target_timeframe: str, 
-        start_date: datetime, 
-        end_date: datetime
+        start_date: Union[datetime, int], 
+        end_date: Union[datetime, int]
     ) -> Optional[pd.DataFrame]:
         """
         Получает данные с минимальным таймфреймом и ресемплирует их до целевого таймфрейма.
@@ -399,6 +572,45 @@ class DataDownloaderUI:
         # Получаем данные с минимальным таймфреймом
         df_base = self._get_data(symbol, base_timeframe, start_date, end_date)
         
+        return self._resample_data(df_base, base_timeframe, target_timeframe)
+
+    async def _get_resampled_data_async(
+        self, 
+        symbol: str, 
+        target_timeframe: str, 
+        start_date: Union[datetime, int], 
+        end_date: Union[datetime, int]
+    ) -> Optional[pd.DataFrame]:
+        """
+        Асинхронный вариант _get_resampled_data для параллельной загрузки нескольких символов.
+        """
+        base_timeframe = '1m'
+        print(f"Загрузка данных с таймфреймом {base_timeframe} для последующего ресемплирования до {target_timeframe}")
+        df_base = await self._get_data_async(symbol, base_timeframe, start_date, end_date)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._resample_data, df_base, base_timeframe, target_timeframe
+        )
+
+    def _resample_data(
+        self,
+        df_base: Optional[pd.DataFrame],
+        base_timeframe: str,
+        target_timeframe: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        Ресемплирует данные базового таймфрейма до целевого таймфрейма.
+        
+        Агрегация выполняется в исходной точности (float64): результат экспортируется в CSV и Parquet,
+        а float32 искажает цены и суммы объема уже в 7-й значащей цифре.
+        
+        Args:
+            df_base: DataFrame с данными базового таймфрейма
+            base_timeframe: Базовый таймфрейм
+            target_timeframe: Целевой таймфрейм
+            
+        Returns:
+            pd.DataFrame: Ресемплированный DataFrame с данными или None в случае ошибки
+        """
         if df_base is None or df_base.empty:
             print(f"Не удалось получить базовые данные с таймфреймом {base_timeframe}")
             return None
@@ -443,26 +655,7 @@ class DataDownloaderUI:
         Returns:
             Optional[str]: Правило для ресемплирования или None, если не удалось преобразовать
         """
-        # Словарь преобразования таймфреймов Binance в правила ресемплирования pandas
-        timeframe_rules = {
-            '1m': '1min',
-            '3m': '3min',
-            '5m': '5min',
-            '15m': '15min',
-            '30m': '30min',
-            '1h': '1H',
-            '2h': '2H',
-            '4h': '4H',
-            '6h': '6H',
-            '8h': '8H',
-            '12h': '12H',
-            '1d': '1D',
-            '3d': '3D',
-            '1w': '1W',
-            '1M': '1M'
-        }
-        
-        return timeframe_rules.get(timeframe)
+        return _RESAMPLE_RULES.get(timeframe)
     
     def _plot_data(self, df: pd.DataFrame, symbol: str, timeframe: str) -> None:
         """
@@ -476,9 +669,12 @@ class DataDownloaderUI:
         try:
             plt.figure(figsize=(12, 8))
             
+            # Передаем в matplotlib готовые массивы NumPy, минуя преобразования pandas
+            dates = df.index.values
+            
             # График цены
             ax1 = plt.subplot(2, 1, 1)
-            ax1.plot(df.index, df['close'], label='close')
+            ax1.plot(dates, df['close'].to_numpy(dtype=_PLOT_DTYPE), label='close')
             ax1.set_title(f'{symbol} - {timeframe}')
             ax1.set_ylabel('Цена')
             ax1.legend()
@@ -486,7 +682,7 @@ class DataDownloaderUI:
             
             # График объема
             ax2 = plt.subplot(2, 1, 2, sharex=ax1)
-            ax2.bar(df.index, df['volume'], label='volume', alpha=0.7)
+            ax2.bar(dates, df['volume'].to_numpy(dtype=_PLOT_DTYPE), label='volume', alpha=0.7)
             ax2.set_xlabel('Дата')
             ax2.set_ylabel('Объем')
             ax2.legend()
@@ -500,7 +696,7 @@ class DataDownloaderUI:
     
     def _on_show_local_button_clicked(self, button) -> None:
         """
-        Обработчик для кнопки "Данные на Диске". Отображает список доступных данных с чекбоксами в правой колонке.
+        Обработчик для кнопки "Данные на Диске". Отображает список доступных данных в правой колонке.
         """
         with self.output:
             clear_output(wait=True)
@@ -514,31 +710,20 @@ class DataDownloaderUI:
             return
         # Заголовок
         right_header = widgets.HTML("<h4>Данные на Google Drive:</h4>")
-        # Прокручиваемый список чекбоксов
-        local_data_items_container = widgets.VBox(layout=widgets.Layout(
-            width='100%', min_width='480px', max_width='none', max_height='400px',
-            overflow_y='auto', overflow_x='hidden', border='1px solid lightgray',
-            padding='5px', margin='0 0 10px 0', box_sizing='border-box', display='block',
-            flex_flow='column', flex_wrap='nowrap',
-        ))
-        self.local_data_checkboxes = {}
-        checkboxes = []
-        for _, row in stored_info.iterrows():
-            symbol, timeframe, start_date, end_date = row['symbol'], row['timeframe'], row['start_date'], row['end_date']
-            cb = widgets.Checkbox(
-                description=f"{symbol} - {timeframe} (с {start_date} по {end_date})",
-                value=False,
-                indent=False
+        # Единый список множественного выбора: выбор передается одним сообщением, а не по чекбоксу на набор
+        options = [
+            (f"{symbol} - {timeframe} (с {start_date} по {end_date})", (symbol, timeframe))
+            for symbol, timeframe, start_date, end_date in zip(
+                stored_info['symbol'], stored_info['timeframe'], stored_info['start_date'], stored_info['end_date']
             )
-            self.local_data_checkboxes[(symbol, timeframe)] = cb
-            checkboxes.append(cb)
-        local_data_items_container.children = tuple(checkboxes)
+        ]
+        self.local_data_select = widgets.SelectMultiple(options=options, value=[], rows=12, layout=_L_LOCAL_LIST)
         # Кнопки и чекбокс подтверждения
-        self.export_local_csv_button = widgets.Button(description='Экспорт в CSV', icon='file-excel', layout=widgets.Layout(width='auto', margin='0 5px 0 0'))
-        self.export_local_parquet_button = widgets.Button(description='Экспорт в Parquet', icon='file-archive', layout=widgets.Layout(width='auto', margin='0 5px 0 0'))
-        self.load_as_current_df_button = widgets.Button(description='Загрузить как текущий датафрейм', icon='table', layout=widgets.Layout(width='auto', margin='0 5px 0 0'))
-        self.delete_local_selected_button = widgets.Button(description='Удалить выбранное', button_style='danger', icon='trash', layout=widgets.Layout(width='auto'))
-        self.confirm_delete_local_list_checkbox = widgets.Checkbox(description='Подтверждаю удаление выбранного из списка', value=False, indent=False, layout=widgets.Layout(margin='5px 0'))
+        self.export_local_csv_button = widgets.Button(description='Экспорт в CSV', icon='file-excel', layout=_L_LOCAL_BTN)
+        self.export_local_parquet_button = widgets.Button(description='Экспорт в Parquet', icon='file-archive', layout=_L_LOCAL_BTN)
+        self.load_as_current_df_button = widgets.Button(description='Загрузить как текущий датафрейм', icon='table', layout=_L_LOCAL_BTN)
+        self.delete_local_selected_button = widgets.Button(description='Удалить выбранное', button_style='danger', icon='trash', layout=_L_AUTO)
+        self.confirm_delete_local_list_checkbox = widgets.Checkbox(description='Подтверждаю удаление выбранного из списка', value=False, indent=False, layout=_L_CONFIRM)
         # Привязка обработчиков
         self.export_local_csv_button.on_click(lambda b: self._on_export_local_data_clicked(b, export_format='CSV'))
         self.export_local_parquet_button.on_click(lambda b: self._on_export_local_data_clicked(b, export_format='Parquet'))
@@ -550,7 +735,7 @@ class DataDownloaderUI:
             widgets.HBox([self.delete_local_selected_button, self.confirm_delete_local_list_checkbox])
         ])
         # Обновить правую колонку
-        self.local_data_management_area.children = (right_header, local_data_items_container, action_buttons_for_local_data)
+        self.local_data_management_area.children = (right_header, self.local_data_select, action_buttons_for_local_data)
 
         # Удаляем горизонтальный скролл у всего интерфейса (VBox/HBox)
         # Применяем к main_container после display
@@ -568,7 +753,7 @@ class DataDownloaderUI:
         """
         with self.output:
             clear_output(wait=True)
-            selected_items = [(symbol, timeframe) for (symbol, timeframe), cb in self.local_data_checkboxes.items() if cb.value]
+            selected_items = list(self.local_data_select.value)
             if not selected_items:
                 print("Ничего не выбрано для экспорта.")
                 return
@@ -584,7 +769,7 @@ class DataDownloaderUI:
                     filepath = os.path.join(exports_dir, filename)
                     try:
                         if export_format == 'CSV':
-                            df.to_csv(filepath, index=True)
+                            self._write_csv(df, filepath)
                         elif export_format == 'Parquet':
                             df.to_parquet(filepath, index=True)
                         print(f"Экспортировано: {filepath}")
@@ -604,7 +789,7 @@ class DataDownloaderUI:
         """
         with self.output:
             clear_output(wait=True)
-            selected_items = [(symbol, timeframe) for (symbol, timeframe), cb in self.local_data_checkboxes.items() if cb.value]
+            selected_items = list(self.local_data_select.value)
             if not selected_items:
                 print("Ничего не выбрано для удаления.")
                 return
@@ -624,7 +809,7 @@ class DataDownloaderUI:
     def _on_load_as_current_df_clicked(self, button) -> None:
         with self.output:
             clear_output(wait=True)
-            selected_items = [(symbol, timeframe) for (symbol, timeframe), cb in self.local_data_checkboxes.items() if cb.value]
+            selected_items = list(self.local_data_select.value)
             if not selected_items:
                 print("Ничего не выбрано для загрузки.")
                 return
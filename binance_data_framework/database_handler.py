@@ -4,12 +4,266 @@
 """
 Модуль для работы с базой данных на Google Drive для хранения данных Binance.
 """
-from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple, Union
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple, Union, Callable
+import logging
 import os
+import re
 import sqlite3
+import threading
+import time
+from itertools import chain, islice
+from pathlib import Path
+import numpy as np
 import pandas as pd
 
+from binance_data_framework.api_connector import _is_colab
+
+# Служебная диагностика (откаты на запасные варианты) идет в логгер; сообщения для пользователя — через print
+logger = logging.getLogger(__name__)
+
+# Необязательный ADBC-драйвер SQLite: get_data читает диапазон сразу в колонки Arrow
+try:
+    import adbc_driver_sqlite.dbapi as adbc_sqlite
+except ImportError:
+    adbc_sqlite = None
+
+# Настройки SQLite для массовой записи: меньше fsync на каждый commit (критично для Google Drive),
+# временные данные в памяти, кэш страниц 64 МБ и отображение файла в память 256 МБ
+_CONNECTION_PRAGMAS = (
+    'synchronous=NORMAL',
+    'temp_store=MEMORY',
+    'cache_size=-65536',
+    'mmap_size=268435456',
+    # Явное ожидание блокировки (мс): чтение из другого потока не падает с "database is locked",
+    # пока поток записи держит транзакцию
+    'busy_timeout=5000',
+)
+
+# Запросы горячего пути вынесены в константы: один и тот же текст SQL попадает
+# в кэш подготовленных выражений соединения и не разбирается SQLite повторно.
+# Вставка формируется отдельно для каждой пары symbol/timeframe, поэтому кэш больше стандартных 128
+_STATEMENT_CACHE_SIZE = 256
+_SQL_META_LOOKUP = 'SELECT start_timestamp, end_timestamp FROM ohlcv_metadata WHERE symbol=? AND timeframe=?'
+# Строки ohlcv_data ссылаются на пару по pair_id. Чтение находит его подзапросом по уникальному ключу
+# (symbol, timeframe) в ohlcv_pairs: подзапрос вычисляется один раз, параметры запросов остаются прежними
+_SQL_PAIR_ID_SUBQUERY = '(SELECT pair_id FROM ohlcv_pairs WHERE symbol=? AND timeframe=?)'
+_SQL_DELETE_PAIR_DATA = 'DELETE FROM ohlcv_data WHERE pair_id=' + _SQL_PAIR_ID_SUBQUERY
+_SQL_DELETE_METADATA = 'DELETE FROM ohlcv_metadata WHERE symbol=? AND timeframe=?'
+_SQL_PAIR_ID_LOOKUP = 'SELECT pair_id FROM ohlcv_pairs WHERE symbol=? AND timeframe=?'
+_SQL_PAIR_ID_INSERT = 'INSERT OR IGNORE INTO ohlcv_pairs (symbol, timeframe) VALUES (?, ?)'
+# План: SEARCH ohlcv_data USING PRIMARY KEY (pair_id=?) — читаются только первые limit ключей, без сортировки
+_SQL_FIRST_TIMESTAMPS = (
+    'SELECT timestamp, typeof(timestamp) FROM ohlcv_data WHERE pair_id=' + _SQL_PAIR_ID_SUBQUERY +
+    ' ORDER BY timestamp LIMIT ?'
+)
+_SQL_META_COVERAGE = (
+    'SELECT start_timestamp, end_timestamp, (start_timestamp <= ? AND end_timestamp + ? >= ?) AS covered '
+    'FROM ohlcv_metadata WHERE symbol=? AND timeframe=?'
+)
+_SQL_META_MANY = (
+    'SELECT symbol, timeframe, start_timestamp, end_timestamp FROM ohlcv_metadata '
+    'WHERE (symbol, timeframe) IN (VALUES {pairs})'
+)
+# План: SEARCH ohlcv_data USING PRIMARY KEY (pair_id=? AND timestamp>? AND timestamp<?).
+# Строки читаются в порядке ключа, поэтому ORDER BY не требует сортировки; он оставлен, чтобы порядок
+# результата не зависел от выбора плана
+_SQL_GET_DATA = (
+    'SELECT timestamp, open, high, low, close, volume FROM ohlcv_data '
+    'WHERE pair_id=' + _SQL_PAIR_ID_SUBQUERY + ' AND timestamp BETWEEN ? AND ? ORDER BY timestamp'
+)
+# Явные типы колонок при чтении: порция, где все значения NULL, не превращается в object
+_OHLCV_READ_DTYPES = {'open': 'float64', 'high': 'float64', 'low': 'float64', 'close': 'float64', 'volume': 'float64'}
+# Тип колонок OHLCV при get_data(..., dtype_backend='pyarrow')
+_ARROW_OHLCV_DTYPE = 'double[pyarrow]'
+# Выборка сразу по нескольким парам: (symbol, timeframe) IN (VALUES ...) по небольшой таблице ohlcv_pairs,
+# затем поиск по первичному ключу ohlcv_data для каждой пары. CROSS JOIN фиксирует этот порядок соединения
+# (иначе без статистики SQLite может выбрать полный просмотр ohlcv_data). ORDER BY гарантирует, что строки
+# каждой пары идут подряд и по возрастанию timestamp независимо от плана: при нескольких парах он совпадает
+# с порядком обхода и бесплатен, для одной пары SQLite может добавить сортировку результата
+# Выбираются только числовые колонки: строки пары определяются по pair_id (имена — отдельным запросом
+# к ohlcv_pairs), поэтому результат читается в массив без строковых объектов на каждую строку
+_SQL_GET_DATA_MANY = (
+    'SELECT d.pair_id, d.timestamp, d.open, d.high, d.low, d.close, d.volume '
+    'FROM ohlcv_pairs p CROSS JOIN ohlcv_data d ON d.pair_id = p.pair_id '
+    'WHERE (p.symbol, p.timeframe) IN (VALUES {pairs}) AND d.timestamp BETWEEN ? AND ? '
+    'ORDER BY p.pair_id, d.timestamp'
+)
+_SQL_PAIR_IDS_MANY = 'SELECT pair_id, symbol, timeframe FROM ohlcv_pairs WHERE (symbol, timeframe) IN (VALUES {pairs})'
+# Пар в одном запросе: 2 параметра на пару + 2 границы укладываются в лимит 999 старых SQLite
+_PAIRS_PER_QUERY = 400
+# Границы «всего диапазона» для выгрузки пары целиком (timestamp в мс, знаковый 64-битный INTEGER SQLite)
+_MIN_TIMESTAMP_MS = 0
+_MAX_TIMESTAMP_MS = 2 ** 63 - 1
+# Размер порции fetchmany при чтении get_data через sqlite3
+_FETCH_BATCH_ROWS = 65536
+# Строк в одном DataFrame get_data_iter по умолчанию
+_ITER_CHUNK_ROWS = 100_000
+# pair_id подставляется литералом (одинаков для всего пакета), в строках остаются 6 параметров.
+# Выражение вставки может содержать несколько строк VALUES (до _ROWS_PER_INSERT)
+_OHLCV_ROW_PARAMS = 6
+_ROWS_PER_INSERT = 500
+# Число строк, параметры которых собираются в список Python за один раз (кратно числу строк в INSERT)
+_ROWS_PER_BATCH = 10_000
+_SQL_OHLCV_ROW = '(?, {pair_id}, ?, ?, ?, ?, ?)'
+_SQL_UPSERT_OHLCV = (
+    'INSERT INTO ohlcv_data (timestamp, pair_id, open, high, low, close, volume) '
+    'VALUES {rows} '
+    'ON CONFLICT (pair_id, timestamp) DO UPDATE SET '
+    'open=excluded.open, high=excluded.high, low=excluded.low, close=excluded.close, volume=excluded.volume'
+)
+# Метаданные обновляются одним выражением, без предварительного SELECT. Новая строка получает границы
+# данных пары из ohlcv_data (данные могли быть записаны без метаданных). MIN и MAX в отдельных подзапросах:
+# так каждый из них — один спуск по первичному ключу, а MIN(...), MAX(...) в одном SELECT заставляют SQLite
+# просмотреть все строки пары. Границы покрытия только расширяются: сохранение хвостового фрагмента
+# не сужает записанный диапазон. WHERE true нужен парсеру SQLite для upsert в INSERT ... SELECT
+_SQL_UPSERT_METADATA = (
+    'INSERT INTO ohlcv_metadata (symbol, timeframe, start_timestamp, end_timestamp) '
+    'SELECT ?1, ?2, (SELECT MIN(timestamp) FROM ohlcv_data WHERE pair_id=?3), '
+    '(SELECT MAX(timestamp) FROM ohlcv_data WHERE pair_id=?3) WHERE true '
+    'ON CONFLICT (symbol, timeframe) DO UPDATE SET '
+    'start_timestamp=MIN(excluded.start_timestamp, COALESCE(start_timestamp, excluded.start_timestamp)), '
+    'end_timestamp=MAX(excluded.end_timestamp, COALESCE(end_timestamp, excluded.end_timestamp))'
+)
+
+# Сообщение об операции записи после close()
+_CLOSED_WRITE_MESSAGE = "Соединение с БД на Google Drive закрыто, операция записи не выполнена"
+# Максимум сохранений save_data_async, ожидающих потока записи; следующий вызов ждет освобождения места
+_MAX_PENDING_WRITES = 8
+# Делители для перевода меток datetime64 в миллисекунды по единице хранения
+_DATETIME_UNIT_MS_DIVISORS = {'ns': 1_000_000, 'us': 1_000, 'ms': 1}
+# Размер LRU-кэша результатов check_data_exists
+_EXISTS_CACHE_SIZE = 256
+
+# Начало эпохи Unix; наивные datetime во фреймворке трактуются как UTC (как и метки свечей Binance)
+_EPOCH = datetime(1970, 1, 1)
+
+# Длительность таймфреймов Binance в миллисекундах ('1M' — условные 30 дней)
+_TIMEFRAME_MS = {
+    '1m': 60 * 1000,
+    '3m': 3 * 60 * 1000,
+    '5m': 5 * 60 * 1000,
+    '15m': 15 * 60 * 1000,
+    '30m': 30 * 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '2h': 2 * 60 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000,
+    '6h': 6 * 60 * 60 * 1000,
+    '8h': 8 * 60 * 60 * 1000,
+    '12h': 12 * 60 * 60 * 1000,
+    '1d': 24 * 60 * 60 * 1000,
+    '3d': 3 * 24 * 60 * 60 * 1000,
+    '1w': 7 * 24 * 60 * 60 * 1000,
+    '1M': 30 * 24 * 60 * 60 * 1000,
+}
+
+# Версия схемы в PRAGMA user_version: 2 — ohlcv_data WITHOUT ROWID с ключом (symbol, timeframe, timestamp),
+# 3 — то же плюс STRICT (строгая типизация колонок, SQLite 3.37+), 4 — ohlcv_metadata тоже WITHOUT ROWID,
+# 5 — symbol и timeframe вынесены в ohlcv_pairs, ohlcv_data с ключом (pair_id, timestamp)
+_SCHEMA_VERSION = 5
+
+# STRICT поддерживается с SQLite 3.37; на более старых версиях таблица создается без него
+_SQLITE_HAS_STRICT = sqlite3.sqlite_version_info >= (3, 37, 0)
+
+# Проверки CREATE-выражения ohlcv_data из sqlite_master
+_TIMESTAMP_INTEGER_RE = re.compile(r'\btimestamp\s+INTEGER\b', re.IGNORECASE)
+# Одноколоночные индексы старой схемы: первичный ключ (pair_id, timestamp) их полностью заменяет
+_LEGACY_OHLCV_INDEXES = ('idx_symbol', 'idx_timeframe', 'idx_timestamp')
+# Проверка при открытии БД одним запросом: версия схемы и имена устаревших индексов (через запятую или NULL)
+_SQL_STARTUP_PROBE = (
+    "SELECT (SELECT user_version FROM pragma_user_version), "
+    "(SELECT group_concat(name) FROM sqlite_master WHERE type='index' AND name IN ({names}))"
+).format(names=', '.join(f"'{name}'" for name in _LEGACY_OHLCV_INDEXES))
+_OHLCV_PRIMARY_KEY_RE = re.compile(r'PRIMARY\s+KEY\s*\(\s*pair_id\s*,\s*timestamp\s*\)', re.IGNORECASE)
+
+# Справочник пар: строка symbol/timeframe хранится один раз, а не в каждой свече и в каждом узле ключа
+_PAIRS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS ohlcv_pairs (
+        pair_id INTEGER PRIMARY KEY,
+        symbol TEXT NOT NULL,
+        timeframe TEXT NOT NULL,
+        UNIQUE (symbol, timeframe)
+    )'''
+
+_OHLCV_TABLE_SQL = '''
+    CREATE TABLE {if_not_exists}{table} (
+        pair_id INTEGER,
+        timestamp INTEGER,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        PRIMARY KEY (pair_id, timestamp)
+    ) WITHOUT ROWID''' + (', STRICT' if _SQLITE_HAS_STRICT else '')
+
+# Метаданные тоже хранятся по первичному ключу: без rowid и отдельного автоиндекса sqlite_autoindex
+_METADATA_TABLE_SQL = '''
+    CREATE TABLE {if_not_exists}{table} (
+        symbol TEXT,
+        timeframe TEXT,
+        start_timestamp INTEGER,
+        end_timestamp INTEGER,
+        PRIMARY KEY (symbol, timeframe)
+    ) WITHOUT ROWID'''
+
+def _apply_connection_pragmas(conn: sqlite3.Connection) -> None:
+    """
+    Применяет _CONNECTION_PRAGMAS по одной: если настройка не поддерживается файловой системой
+    (например, mmap на FUSE-монтировании Google Drive), она пропускается, а остальные применяются.
+    """
+    for pragma in _CONNECTION_PRAGMAS:
+        try:
+            conn.execute(f'PRAGMA {pragma}')
+        except sqlite3.Error as e:
+            logger.debug("PRAGMA %s не применена: %s", pragma, e)
+
+@lru_cache(maxsize=_STATEMENT_CACHE_SIZE)
+def _upsert_ohlcv_sql(pair_id: int, rows: int) -> str:
+    """
+    Возвращает текст вставки _SQL_UPSERT_OHLCV на rows строк для пары pair_id.
+    Текст многострочного INSERT занимает десятки килобайт, поэтому он собирается один раз на пару
+    и размер пачки, а не при каждом сохранении; тот же объект строки попадает в кэш выражений соединения.
+    """
+    row_sql = _SQL_OHLCV_ROW.format(pair_id=int(pair_id))
+    return _SQL_UPSERT_OHLCV.format(rows=', '.join([row_sql] * rows))
+
+@lru_cache(maxsize=_STATEMENT_CACHE_SIZE)
+def _pairs_sql(template: str, pairs: int) -> str:
+    """
+    Возвращает текст запроса template со списком VALUES на pairs пар (symbol, timeframe).
+    Текст собирается один раз на число пар, а не при каждом вызове get_data_many.
+    """
+    return template.format(pairs=', '.join(['(?, ?)'] * pairs))
+
+def _db_parent_directory() -> str:
+    """
+    Определяет среду выполнения и возвращает родительскую директорию БД: Google Drive (в Colab монтируется
+    при необходимости) или текущую директорию. Вызывается при каждом создании менеджера, поэтому неудачное
+    монтирование повторяется при следующем создании, а смена директории через os.chdir учитывается.
+    Returns:
+        str: Родительская директория БД
+    """
+    if _is_colab():
+        try:
+            from google.colab import drive
+            drive_mount_point = '/content/drive'
+            if not os.path.ismount(drive_mount_point):
+                try:
+                    drive.mount(drive_mount_point, force_remount=True)
+                    print("Google Drive успешно смонтирован.")
+                except Exception as e:
+                    print(f"ОШИБКА: Не удалось смонтировать Google Drive: {e}. Работа фреймворка невозможна.")
+            else:
+                print("Google Drive уже смонтирован.")
+            return '/content/drive/MyDrive/'
+        except Exception:
+            return os.path.abspath('.')
+    return os.path.abspath('.')
+
 class GoogleDriveDataManager:
     """
     Класс для управления базой данных на Google Drive для хранения исторических данных.
@@ -22,33 +276,7 @@ class GoogleDriveDataManager:
         Автоматически проверяет среду выполнения и настраивает путь к базе данных на Google Drive (если Colab).
         В других средах использует локальный путь.
         """
-        try:
-            from IPython import get_ipython
-            is_colab = 'google.colab' in str(get_ipython())
-        except ImportError:
-            is_colab = False
-        except NameError:
-            is_colab = False
-
-        if is_colab:
-            try:
-                from google.colab import drive
-                drive_mount_point = '/content/drive'
-                if not os.path.ismount(drive_mount_point):
-                    try:
-                        drive.mount(drive_mount_point, force_remount=True)
-                        print("Google Drive успешно смонтирован.")
-                    except Exception as e:
-                        print(f"ОШИБКА: Не удалось смонтировать Google Drive: {e}. Работа фреймворка невозможна.")
-                else:
-                    print("Google Drive уже смонтирован.")
-                db_parent_directory = '/content/drive/MyDrive/'
-            except Exception:
-                db_parent_directory = os.path.abspath('.')
-        else:
-            db_parent_directory = os.path.abspath('.')
-
-        self.db_directory = os.path.join(db_parent_directory, 'database_binance_framework')
+        self.db_directory = os.path.join(_db_parent_directory(), 'database_binance_framework')
         db_filename = 'binance_ohlcv_data.db'
         self.db_path = os.path.join(self.db_directory, db_filename)
 
@@ -58,7 +286,25 @@ class GoogleDriveDataManager:
             raise RuntimeError(f"ОШИБКА: Не удалось создать директорию для БД '{self.db_directory}': {e}")
 
         self.conn = None
-        self.cursor = None
+        # Соединения только для чтения (sqlite3 и, если установлен, ADBC): по одному на поток,
+        # создаются при первом чтении
+        self._tls = threading.local()
+        self._read_conns: List[Any] = []
+        self._read_conns_lock = threading.Lock()
+        # LRU-кэш ответов check_data_exists; сбрасывается при любой записи через этот менеджер
+        self._exists_cache: 'OrderedDict[tuple, Tuple[bool, Optional[Tuple[datetime, datetime]]]]' = OrderedDict()
+        self._exists_cache_lock = threading.Lock()
+        # Все записи выполняются в одном потоке через основное соединение: транзакции разных потоков
+        # не перемешиваются на общем курсоре и не конкурируют за блокировку файла на Google Drive
+        self._writer_thread_id = None
+        self._write_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix='bdf-sqlite-writer',
+            initializer=self._register_writer_thread
+        )
+        self._pending_writes = threading.BoundedSemaphore(_MAX_PENDING_WRITES)
+        # Устанавливается в close(): после закрытия операции записи возвращают False
+        self._closed = False
         if self._connect():
             self.initialize_db()
         else:
@@ -72,92 +318,318 @@ class GoogleDriveDataManager:
             bool: True, если соединение успешно, иначе False
         """
         try:
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.cursor = self.conn.cursor()
+            self.conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=_STATEMENT_CACHE_SIZE
+            )
+            self._configure_connection()
             return True
         except sqlite3.Error as e:
             print(f"Ошибка подключения к БД на Google Drive ({self.db_path}): {e}")
             self.conn = None
-            self.cursor = None
             return False
         except Exception as e:
             print(f"Непредвиденная ошибка при подключении к БД на Google Drive: {e}")
             self.conn = None
-            self.cursor = None
             return False
 
+    def _register_writer_thread(self) -> None:
+        """
+        Запоминает поток записи (вызывается при его запуске).
+        """
+        self._writer_thread_id = threading.get_ident()
+
+    def _run_on_writer(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполняет операцию записи в потоке записи и возвращает ее результат (исключения пробрасываются).
+        Вызов из самого потока записи выполняется сразу, без постановки в очередь.
+        После close() операция не выполняется и возвращается False.
+        """
+        if threading.get_ident() == self._writer_thread_id:
+            return func(*args)
+        if self._closed:
+            print(_CLOSED_WRITE_MESSAGE)
+            return False
+        try:
+            future = self._write_executor.submit(func, *args)
+        except RuntimeError:
+            # close() из другого потока мог остановить поток записи после проверки флага
+            print(_CLOSED_WRITE_MESSAGE)
+            return False
+        return future.result()
+
+    def _get_read_conn(self) -> sqlite3.Connection:
+        """
+        Возвращает соединение только для чтения, принадлежащее текущему потоку.
+        В режиме WAL такие соединения читают параллельно с записью и не ждут основное соединение,
+        поэтому чтение из интерфейса не блокируется фоновым сохранением.
+        Returns:
+            sqlite3.Connection: Соединение потока; при ошибке открытия — основное соединение
+        Raises:
+            sqlite3.ProgrammingError: Если менеджер уже закрыт (close())
+        """
+        if self._closed:
+            # Иначе после close() открылось бы новое соединение, которое уже никто не закроет
+            raise sqlite3.ProgrammingError("Соединение с БД на Google Drive закрыто")
+        conn = getattr(self._tls, 'conn', None)
+        if conn is not None:
+            return conn
+        try:
+            conn = sqlite3.connect(
+                f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                cached_statements=_STATEMENT_CACHE_SIZE
+            )
+            _apply_connection_pragmas(conn)
+        except sqlite3.Error as e:
+            logger.warning("Не удалось открыть соединение для чтения БД на Google Drive, используется основное: %s", e)
+            return self.conn
+        self._tls.conn = conn
+        with self._read_conns_lock:
+            self._read_conns.append(conn)
+        return conn
+
+    def _configure_connection(self) -> None:
+        """
+        Включает журнал WAL и применяет _CONNECTION_PRAGMAS.
+        Если файловая система не поддерживает WAL (бывает на FUSE-дисках), используется журнал в памяти.
+        Ошибки настройки не критичны: соединение остается рабочим с параметрами по умолчанию.
+        """
+        try:
+            journal_mode = self.conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+            if str(journal_mode).lower() != 'wal':
+                logger.info("Журнал WAL недоступен (journal_mode=%s), используется журнал в памяти", journal_mode)
+                self.conn.execute('PRAGMA journal_mode=MEMORY')
+        except sqlite3.Error as e:
+            logger.warning("Не удалось применить настройки SQLite для БД на Google Drive: %s", e)
+        _apply_connection_pragmas(self.conn)
+
     def initialize_db(self) -> None:
         """
         Создает таблицы в базе данных, если их еще нет. Если структура некорректна (timestamp не INTEGER), пересоздает таблицы.
+        Проверенная схема отмечается в PRAGMA user_version, и при следующих запусках проверка пропускается.
         """
         try:
             if not self.conn:
                 print("Нет соединения с БД на Google Drive для инициализации.")
                 return
-            # Проверка структуры таблицы ohlcv_data
-            self.cursor.execute("PRAGMA table_info(ohlcv_data);")
-            columns = self.cursor.fetchall()
-            needs_recreate = False
-            for col in columns:
-                if (col[1] == 'timestamp' and col[2].upper() != 'INTEGER'):
-                    print("❌ Обнаружен некорректный тип timestamp в ohlcv_data. Будет выполнено пересоздание таблицы.")
-                    needs_recreate = True
+            user_version, legacy_indexes = self.conn.execute(_SQL_STARTUP_PROBE).fetchone()
+            if user_version >= _SCHEMA_VERSION:
+                # Обычный запуск: схема уже проверена, DDL и commit не выполняются
+                if legacy_indexes:
+                    self._drop_legacy_indexes(legacy_indexes.split(','))
+                print(f"База данных на Google Drive ({self.db_path}) инициализирована.")
+                return
+            # Проверка структуры таблицы ohlcv_data по ее CREATE-выражению (один запрос)
+            row = self.conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='ohlcv_data'").fetchone()
+            table_sql = row[0] if row and row[0] else ''
+            needs_recreate = bool(table_sql) and not _TIMESTAMP_INTEGER_RE.search(table_sql)
             if needs_recreate:
-                self.cursor.execute("DROP TABLE IF EXISTS ohlcv_data;")
-                self.cursor.execute("DROP TABLE IF EXISTS ohlcv_metadata;")
+                print("❌ Обнаружен некорректный тип timestamp в ohlcv_data. Будет выполнено пересоздание таблицы.")
+                self.conn.execute("DROP TABLE IF EXISTS ohlcv_data;")
+                self.conn.execute("DROP TABLE IF EXISTS ohlcv_metadata;")
+                self.conn.execute("DROP TABLE IF EXISTS ohlcv_pairs;")
                 self.conn.commit()
-            # Создаем таблицу для хранения OHLCV данных
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS ohlcv_data (
-                    timestamp INTEGER, 
-                    symbol TEXT, 
-                    timeframe TEXT, 
-                    open REAL, 
-                    high REAL, 
-                    low REAL, 
-                    close REAL, 
-                    volume REAL,
-                    PRIMARY KEY (timestamp, symbol, timeframe)
-                )
-            ''')
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_symbol ON ohlcv_data (symbol)')
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_timeframe ON ohlcv_data (timeframe)')
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON ohlcv_data (timestamp)')
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS ohlcv_metadata (
-                    symbol TEXT,
-                    timeframe TEXT,
-                    start_timestamp INTEGER,
-                    end_timestamp INTEGER,
-                    PRIMARY KEY (symbol, timeframe)
-                )
-            ''')
+            self.conn.execute(_PAIRS_TABLE_SQL)
+            # Создаем таблицу для хранения OHLCV данных. Все запросы фильтруют по паре (pair_id) и диапазону
+            # timestamp, поэтому таблица кластеризована по первичному ключу в этом порядке (WITHOUT ROWID):
+            # чтение диапазона — это последовательный проход по ключу без вторичных индексов
+            self.conn.execute(_OHLCV_TABLE_SQL.format(table='ohlcv_data', if_not_exists='IF NOT EXISTS '))
+            if table_sql and not needs_recreate and self._is_legacy_ohlcv_layout(table_sql):
+                self._migrate_ohlcv_layout()
+            row = self.conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='ohlcv_metadata'").fetchone()
+            self.conn.execute(_METADATA_TABLE_SQL.format(table='ohlcv_metadata', if_not_exists='IF NOT EXISTS '))
+            if row and row[0] and 'WITHOUT ROWID' not in row[0].upper():
+                self._migrate_metadata_layout()
+            self.conn.execute(f'PRAGMA user_version = {_SCHEMA_VERSION}')
             self.conn.commit()
+            self._drop_legacy_indexes()
             print(f"База данных на Google Drive ({self.db_path}) инициализирована.")
         except sqlite3.Error as e:
             print(f"Ошибка инициализации БД на Google Drive: {e}")
         except Exception as e:
             print(f"Непредвиденная ошибка при инициализации БД на Google Drive: {e}")
 
+    def _drop_legacy_indexes(self, names: Optional[List[str]] = None) -> None:
+        """
+        Удаляет одноколоночные индексы старой схемы (_LEGACY_OHLCV_INDEXES), если они есть: их может
+        заново создать предыдущая версия фреймворка, открывшая уже перестроенную БД. Такие индексы
+        не используются при чтении, но замедляют каждую вставку.
+        Args:
+            names: Уже найденные имена индексов (если None, они ищутся в sqlite_master)
+        """
+        if names is None:
+            names = [row[0] for row in self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='index' AND name IN ({})".format(
+                    ', '.join('?' * len(_LEGACY_OHLCV_INDEXES))
+                ),
+                _LEGACY_OHLCV_INDEXES
+            )]
+        if not names:
+            return
+        for name in names:
+            self.conn.execute(f'DROP INDEX IF EXISTS {name}')
+        self.conn.commit()
+        logger.info("Удалены устаревшие индексы ohlcv_data: %s", ', '.join(names))
+
+    def _is_legacy_ohlcv_layout(self, table_sql: str) -> bool:
+        """
+        Проверяет, создана ли таблица ohlcv_data по старой схеме (rowid, symbol и timeframe в каждой строке
+        вместо ключа (pair_id, timestamp) или отсутствие STRICT, если версия SQLite его поддерживает).
+        Args:
+            table_sql: CREATE-выражение таблицы ohlcv_data из sqlite_master
+        Returns:
+            bool: True, если таблицу нужно перестроить
+        """
+        table_sql = table_sql.upper()
+        if _SQLITE_HAS_STRICT and 'STRICT' not in table_sql:
+            return True
+        return not _OHLCV_PRIMARY_KEY_RE.search(table_sql) or 'WITHOUT ROWID' not in table_sql
+
+    def _begin_write(self) -> None:
+        """
+        Открывает транзакцию записи BEGIN IMMEDIATE: блокировка на запись берется сразу, а не повышается
+        из разделяемой при первом INSERT/DELETE, и все изменения фиксируются одним commit.
+        Если транзакция уже открыта, ничего не делает (модуль sqlite3 не откроет вторую неявно).
+        """
+        if not self.conn.in_transaction:
+            self.conn.execute('BEGIN IMMEDIATE')
+
+    def _migrate_ohlcv_layout(self) -> None:
+        """
+        Однократно перестраивает ohlcv_data в схему WITHOUT ROWID (и STRICT) с ключом (pair_id, timestamp):
+        пары symbol/timeframe заносятся в ohlcv_pairs, а строки свечей хранят только их pair_id.
+        Данные копируются в одной транзакции в порядке нового ключа, поэтому B-дерево заполняется
+        последовательно и страницы одной пары лежат подряд.
+        Старые вторичные индексы удаляются вместе с таблицей.
+        """
+        print("Перестройка таблицы ohlcv_data под ключ (pair_id, timestamp)...")
+        self._begin_write()
+        try:
+            self.conn.execute('DROP TABLE IF EXISTS ohlcv_data_new')
+            self.conn.execute(_OHLCV_TABLE_SQL.format(table='ohlcv_data_new', if_not_exists=''))
+            self.conn.execute('''
+                INSERT OR IGNORE INTO ohlcv_pairs (symbol, timeframe)
+                SELECT DISTINCT symbol, timeframe FROM ohlcv_data
+                WHERE symbol IS NOT NULL AND timeframe IS NOT NULL
+                ORDER BY symbol, timeframe
+            ''')
+            self.conn.execute('''
+                INSERT INTO ohlcv_data_new (pair_id, timestamp, open, high, low, close, volume)
+                SELECT p.pair_id, CAST(d.timestamp AS INTEGER), CAST(d.open AS REAL), CAST(d.high AS REAL),
+                       CAST(d.low AS REAL), CAST(d.close AS REAL), CAST(d.volume AS REAL)
+                FROM ohlcv_data d
+                JOIN ohlcv_pairs p ON p.symbol = d.symbol AND p.timeframe = d.timeframe
+                WHERE true
+                ORDER BY p.pair_id, d.timestamp
+                ON CONFLICT (pair_id, timestamp) DO UPDATE SET
+                    open=excluded.open, high=excluded.high, low=excluded.low,
+                    close=excluded.close, volume=excluded.volume
+            ''')
+            self.conn.execute('DROP TABLE ohlcv_data')
+            self.conn.execute('ALTER TABLE ohlcv_data_new RENAME TO ohlcv_data')
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        self.conn.execute('ANALYZE')
+        # Страницы старой таблицы и ее индексов (idx_symbol, idx_timeframe, idx_timestamp) остаются в файле
+        # свободными; VACUUM возвращает их, чтобы файл на Google Drive не хранил удаленные индексы
+        self.conn.execute('VACUUM')
+        print("Перестройка таблицы ohlcv_data завершена.")
+
+    def _migrate_metadata_layout(self) -> None:
+        """
+        Однократно перестраивает ohlcv_metadata в схему WITHOUT ROWID (таблица небольшая, копия в одной транзакции).
+        """
+        self._begin_write()
+        try:
+            self.conn.execute('DROP TABLE IF EXISTS ohlcv_metadata_new')
+            self.conn.execute(_METADATA_TABLE_SQL.format(table='ohlcv_metadata_new', if_not_exists=''))
+            self.conn.execute('''
+                INSERT INTO ohlcv_metadata_new (symbol, timeframe, start_timestamp, end_timestamp)
+                SELECT symbol, timeframe, start_timestamp, end_timestamp
+                FROM ohlcv_metadata
+                WHERE symbol IS NOT NULL AND timeframe IS NOT NULL
+                ON CONFLICT (symbol, timeframe) DO UPDATE SET
+                    start_timestamp=excluded.start_timestamp, end_timestamp=excluded.end_timestamp
+            ''')
+            self.conn.execute('DROP TABLE ohlcv_metadata')
+            self.conn.execute('ALTER TABLE ohlcv_metadata_new RENAME TO ohlcv_metadata')
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+
     def _timestamp_to_ms(self, x):
         """
         Преобразует timestamp (int, float, datetime, pd.Timestamp) в миллисекунды.
+        Наивные datetime считаются UTC; datetime с часовым поясом предварительно переводятся в UTC.
         """
+        if type(x) is datetime and x.tzinfo is None:
+            # Самый частый случай (наивный datetime) — одна проверка типа без цепочки isinstance
+            delta = x - _EPOCH
+            return delta.days * 86400000 + delta.seconds * 1000 + delta.microseconds // 1000
         if isinstance(x, (int, float)):
             return int(x)
+        if isinstance(x, datetime):
+            if x.tzinfo is not None:
+                x = x.astimezone(timezone.utc).replace(tzinfo=None)
+            # Целочисленная арифметика вместо x.timestamp(): без обращения к локальному часовому поясу
+            delta = x - _EPOCH
+            return delta.days * 86400000 + delta.seconds * 1000 + delta.microseconds // 1000
         if hasattr(x, 'timestamp'):
             return int(x.timestamp() * 1000)
         raise ValueError(f"Неизвестный формат timestamp: {x}")
 
+    def _timestamps_to_ms(self, values: Union[pd.Series, pd.Index]) -> np.ndarray:
+        """
+        Векторно преобразует колонку или индекс timestamp (datetime64, числа в мс или строки) в миллисекунды.
+        Args:
+            values: Колонка или индекс с метками времени
+        Returns:
+            np.ndarray: Массив int64 с миллисекундами
+        """
+        # Проверка по dtype.kind — сравнение одного символа; разбор строк/объектов через pd.to_datetime
+        # выполняется только для таких данных (у datetime64 с часовым поясом kind тоже 'M')
+        kind = values.dtype.kind
+        if kind in 'iu':
+            return values.to_numpy(dtype='int64')
+        if kind == 'f':
+            raw = values.to_numpy()
+            # NaN при приведении к int64 дает минимальное значение int64, которое сохранилось бы как обычная свеча
+            if np.isnan(raw).any():
+                raise ValueError("Метки времени содержат пропуски (NaN)")
+            return raw.astype('int64')
+        if kind != 'M':
+            values = pd.to_datetime(values)
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            # tz_convert(None) переводит в UTC и снимает часовой пояс за один проход
+            values = values.dt.tz_convert(None) if isinstance(values, pd.Series) else values.tz_convert(None)
+        raw = values.to_numpy()
+        # NaT в представлении int64 — минимальное значение int64, которое сохранилось бы как обычная свеча
+        if np.isnat(raw).any():
+            raise ValueError("Метки времени содержат пропуски (NaT)")
+        divisor = _DATETIME_UNIT_MS_DIVISORS.get(np.datetime_data(raw.dtype)[0])
+        if divisor is None:
+            # Прочие точности (например, секунды) — через приведение к datetime64[ms]
+            return raw.astype('datetime64[ms]').view('int64')
+        # Целочисленное деление представления int64 без копии (точность pandas 2 — ns, pandas 3 — us)
+        # в несколько раз быстрее приведения типа datetime64
+        ticks = raw.view('int64')
+        return ticks if divisor == 1 else np.floor_divide(ticks, divisor)
+
     def _ms_to_datetime(self, ms: int) -> datetime:
         """
-        Преобразует миллисекунды в объект datetime.
+        Преобразует миллисекунды в наивный datetime в UTC (обратно к _timestamp_to_ms).
         Args:
             ms: Timestamp в миллисекундах
         Returns:
             datetime: Объект datetime
         """
-        return datetime.fromtimestamp(ms / 1000)
+        return _EPOCH + timedelta(milliseconds=ms)
 
     def _get_timeframe_duration_ms(self, timeframe: str) -> Optional[int]:
         """
@@ -167,28 +639,7 @@ class GoogleDriveDataManager:
         Returns:
             int: длительность таймфрейма в миллисекундах, либо None если не удалось определить
         """
-        mapping = {
-            '1m': 60 * 1000,
-            '3m': 3 * 60 * 1000,
-            '5m': 5 * 60 * 1000,
-            '15m': 15 * 60 * 1000,
-            '30m': 30 * 1000,
-            '1h': 60 * 60 * 1000,
-            '2h': 2 * 60 * 60 * 1000,
-            '4h': 4 * 60 * 60 * 1000,
-            '6h': 6 * 60 * 60 * 1000,
-            '8h': 8 * 60 * 60 * 1000,
-            '12h': 12 * 60 * 60 * 1000,
-            '1d': 24 * 60 * 60 * 1000,
-            '3d': 3 * 24 * 60 * 60 * 1000,
-            '1w': 7 * 24 * 60 * 60 * 1000,
-        }
-        if timeframe in mapping:
-            return mapping[timeframe]
-        elif timeframe == '1M':
-            return 30 * 24 * 60 * 60 * 1000
-        else:
-            return None
+        return _TIMEFRAME_MS.get(timeframe)
 
     def save_data(self, df: pd.DataFrame, symbol: str, timeframe: str) -> bool:
         """
@@ -199,58 +650,276 @@ class GoogleDriveDataManager:
             timeframe: Таймфрейм
         Returns:
             bool: True, если данные успешно сохранены в БД на Google Drive, иначе False
+        Raises:
+            ValueError: Пустой symbol или некорректные метки времени (транзакция откатывается)
+        """
+        return self._run_on_writer(self._save_data, df, symbol, timeframe)
+
+    def save_data_async(self, df: pd.DataFrame, symbol: str, timeframe: str) -> 'Future[bool]':
+        """
+        Ставит сохранение в очередь потока записи и сразу возвращает управление: commit и fsync на Google Drive
+        выполняются в фоне. Очередь ограничена _MAX_PENDING_WRITES сохранениями. DataFrame не должен
+        изменяться до завершения Future. Для гарантии записи на диск вызовите flush().
+        Args:
+            df: DataFrame с OHLCV данными
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+        Returns:
+            Future[bool]: Результат save_data (исключение ValueError передается через Future)
         """
+        if threading.get_ident() == self._writer_thread_id:
+            # Из потока записи нельзя ждать место в его же очереди: сохранение выполняется сразу
+            future: 'Future[bool]' = Future()
+            try:
+                future.set_result(self._save_data(df, symbol, timeframe))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self._closed:
+            print(_CLOSED_WRITE_MESSAGE)
+            future = Future()
+            future.set_result(False)
+            return future
+        self._pending_writes.acquire()
         try:
-            if not symbol or not isinstance(symbol, str) or symbol.strip() == '':
-                raise ValueError("Symbol не должен быть пустым!")
+            future = self._write_executor.submit(self._save_data, df, symbol, timeframe)
+        except RuntimeError:
+            # close() из другого потока мог остановить поток записи после проверки флага
+            self._pending_writes.release()
+            print(_CLOSED_WRITE_MESSAGE)
+            future = Future()
+            future.set_result(False)
+            return future
+        except BaseException:
+            self._pending_writes.release()
+            raise
+        future.add_done_callback(lambda _: self._pending_writes.release())
+        return future
+
+    def flush(self) -> None:
+        """
+        Дожидается завершения всех сохранений, поставленных в очередь до вызова (save_data_async).
+        """
+        # Поток записи один и обрабатывает очередь по порядку: пустая задача завершается после всех предыдущих
+        self._run_on_writer(lambda: None)
+
+    def _save_data(self, df: pd.DataFrame, symbol: str, timeframe: str) -> bool:
+        """
+        Реализация save_data; выполняется в потоке записи.
+        """
+        def write() -> Optional[str]:
             if df is None or df.empty:
+                return None
+            self._write_frame(df, symbol, timeframe)
+            return f"Данные успешно сохранены в БД на Google Drive для {symbol}/{timeframe}."
+        return self._write_transaction([symbol], write)
+
+    def save_many(self, frames: Dict[Tuple[str, str], pd.DataFrame]) -> bool:
+        """
+        Сохраняет данные нескольких пар и таймфреймов в одной транзакции (один commit на все).
+        Args:
+            frames: Словарь {(symbol, timeframe): DataFrame с OHLCV данными}
+        Returns:
+            bool: True, если все данные сохранены; при ошибке записи изменения не применяются и возвращается False
+        Raises:
+            ValueError: Пустой symbol или некорректные метки времени (изменения откатываются)
+        """
+        return self._run_on_writer(self._save_many, frames)
+
+    def _save_many(self, frames: Dict[Tuple[str, str], pd.DataFrame]) -> bool:
+        """
+        Реализация save_many; выполняется в потоке записи.
+        """
+        def write() -> Optional[str]:
+            non_empty = {key: df for key, df in frames.items() if df is not None and not df.empty}
+            if not non_empty:
+                return None
+            for (symbol, timeframe), df in non_empty.items():
+                self._write_frame(df, symbol, timeframe)
+            saved = ', '.join(f"{symbol}/{timeframe}" for symbol, timeframe in non_empty)
+            return f"Данные успешно сохранены в БД на Google Drive для {saved}."
+        return self._write_transaction([symbol for symbol, _ in frames], write)
+
+    def bulk_load(self, frames: Iterable[pd.DataFrame], symbol: str, timeframe: str) -> bool:
+        """
+        Первичная загрузка большого объема данных одной пары (например, нескольких лет 1m свечей):
+        DataFrame из frames (например, по месяцам) записываются в одной транзакции без промежуточных commit,
+        статистика планировщика обновляется один раз в конце. Для дозагрузки используйте save_data.
+        Args:
+            frames: Итерируемый набор DataFrame с OHLCV данными (может быть генератором)
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+        Returns:
+            bool: True, если данные сохранены; при ошибке записи изменения не применяются и возвращается False
+        Raises:
+            ValueError: Пустой symbol или некорректные метки времени (изменения откатываются)
+        """
+        return self._run_on_writer(self._bulk_load, frames, symbol, timeframe)
+
+    def _bulk_load(self, frames: Iterable[pd.DataFrame], symbol: str, timeframe: str) -> bool:
+        """
+        Реализация bulk_load; выполняется в потоке записи.
+        """
+        def write() -> Optional[str]:
+            rows = 0
+            # Таблица кластеризована по первичному ключу и не имеет вторичных индексов, которые стоило бы
+            # удалять на время загрузки: экономия — в одном commit (и одном fsync) на все части
+            for df in frames:
+                if df is None or df.empty:
+                    continue
+                self._write_frame(df, symbol, timeframe)
+                rows += len(df)
+            if not rows:
+                return None
+            return f"Данные успешно загружены в БД на Google Drive для {symbol}/{timeframe} (строк: {rows})."
+        return self._write_transaction([symbol], write)
+
+    def _write_transaction(self, symbols: Iterable[str], write: Callable[[], Optional[str]]) -> bool:
+        """
+        Общая часть _save_data, _save_many и _bulk_load: проверяет symbol, выполняет write в одной транзакции
+        BEGIN IMMEDIATE (один commit на все изменения), сбрасывает кэш check_data_exists и обновляет статистику.
+        Args:
+            symbols: Торговые пары, которые будут записаны
+            write: Выполняет запись внутри транзакции и возвращает сообщение об успехе
+                (None — записывать нечего, транзакция откатывается)
+        Returns:
+            bool: True, если изменения зафиксированы, иначе False
+        Raises:
+            ValueError: Пустой symbol или некорректные данные (транзакция откатывается)
+        """
+        try:
+            for symbol in symbols:
+                if not symbol or not isinstance(symbol, str) or symbol.strip() == '':
+                    raise ValueError("Symbol не должен быть пустым!")
+            self._begin_write()
+            message = write()
+            if message is None:
+                self.conn.rollback()
                 return False
-            df_to_save = df.copy().reset_index()
-            df_to_save['timestamp'] = df_to_save['timestamp'].apply(lambda x: int(self._timestamp_to_ms(x)))
-            df_to_save['symbol'] = symbol
-            df_to_save['timeframe'] = timeframe
-            columns_order = ['timestamp', 'symbol', 'timeframe', 'open', 'high', 'low', 'close', 'volume']
-            df_to_save = df_to_save[columns_order]
-            records = df_to_save.values.tolist()
-            self.cursor.executemany(
-                'INSERT OR REPLACE INTO ohlcv_data (timestamp, symbol, timeframe, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
-                records
-            )
-            self.cursor.execute(
-                'SELECT MIN(timestamp), MAX(timestamp) FROM ohlcv_data WHERE symbol=? AND timeframe=?',
-                (symbol, timeframe)
-            )
-            row = self.cursor.fetchone()
-            if row and row[0] is not None and row[1] is not None:
-                min_ts, max_ts = int(row[0]), int(row[1])
-                self.cursor.execute(
-                    'INSERT OR REPLACE INTO ohlcv_metadata (symbol, timeframe, start_timestamp, end_timestamp) VALUES (?, ?, ?, ?)',
-                    (symbol, timeframe, min_ts, max_ts)
-                )
             self.conn.commit()
-            print(f"Данные успешно сохранены в БД на Google Drive для {symbol}/{timeframe}.")
+            self._invalidate_exists_cache()
+            self._optimize()
+            print(message)
             return True
         except ValueError as e:
+            # Ошибка может возникнуть уже внутри BEGIN IMMEDIATE (например, при разборе timestamp):
+            # транзакция откатывается, чтобы не удерживать блокировку на запись
+            if self.conn.in_transaction:
+                self.conn.rollback()
             print(f"Ошибка при сохранении данных в БД на Google Drive: {e}")
             raise
-        except sqlite3.IntegrityError:
-            print("Ошибка целостности при сохранении данных в БД на Google Drive.")
-            return False
         except Exception as e:
+            if self.conn.in_transaction:
+                self.conn.rollback()
             print(f"Ошибка при сохранении данных в БД на Google Drive: {e}")
             return False
 
+    def _optimize(self) -> None:
+        """
+        Выполняет PRAGMA optimize (ANALYZE только для таблиц, статистика которых устарела) на основном соединении.
+        Вызывается после commit, вне транзакции записи: ошибка лишь логируется и не откатывает
+        уже зафиксированные данные.
+        """
+        try:
+            self.conn.execute('PRAGMA optimize')
+        except sqlite3.Error as e:
+            logger.debug("PRAGMA optimize не выполнена: %s", e)
+
+    def _write_frame(self, df: pd.DataFrame, symbol: str, timeframe: str) -> None:
+        """
+        Записывает свечи одной пары и обновляет ее метаданные. Вызывается внутри открытой транзакции записи.
+        Args:
+            df: DataFrame с OHLCV данными (непустой)
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+        """
+        # Колонки берутся из df напрямую (для float64 — без копирования), копия всего DataFrame не создается.
+        # Метки времени — из индекса или из колонки timestamp
+        if 'timestamp' in df.columns:
+            ts = self._timestamps_to_ms(df['timestamp'])
+            is_sorted = pd.Index(ts, copy=False).is_monotonic_increasing
+        else:
+            # Индекс преобразуется напрямую, без копирования в Series
+            ts = self._timestamps_to_ms(df.index)
+            # Флаг монотонности индекса кэшируется pandas: для данных Binance проверка обычно бесплатна
+            is_sorted = df.index.is_monotonic_increasing
+        values = [df[col].to_numpy(dtype='float64') for col in ('open', 'high', 'low', 'close', 'volume')]
+        # pair_id постоянен, поэтому сортировка по timestamp дает порядок первичного ключа
+        # и вставки идут в B-дерево последовательно; уже упорядоченные данные не переставляются.
+        # Колонки OHLCV переставляются по порциям ниже, без полной отсортированной копии каждой колонки
+        order = None
+        if not is_sorted:
+            order = np.argsort(ts, kind='stable')
+            ts = ts[order]
+        pair_id = self._ensure_pair_id(symbol, timeframe)
+        rows_per_insert = self._rows_per_insert()
+        packed_size = rows_per_insert * _OHLCV_ROW_PARAMS
+        # Параметры собираются из типизированных массивов (без приведения всей таблицы к object) порциями:
+        # в памяти одновременно список объектов Python не более чем на batch_rows строк, а не на весь DataFrame
+        batch_rows = max(1, _ROWS_PER_BATCH // rows_per_insert) * rows_per_insert
+        for start in range(0, len(ts), batch_rows):
+            stop = start + batch_rows
+            rows = slice(start, stop) if order is None else order[start:stop]
+            params = list(chain.from_iterable(
+                zip(ts[start:stop].tolist(), *(col[rows].tolist() for col in values))
+            ))
+            # Полные пачки строк вставляются многострочными INSERT (меньше обращений к SQLite на строку),
+            # остаток — executemany с однострочным выражением (бывает только в последней порции)
+            packed_end = len(params) - len(params) % packed_size
+            if packed_end:
+                packed_sql = _upsert_ohlcv_sql(pair_id, rows_per_insert)
+                for offset in range(0, packed_end, packed_size):
+                    self.conn.execute(packed_sql, params[offset:offset + packed_size])
+            if packed_end < len(params):
+                row_sql = _upsert_ohlcv_sql(pair_id, 1)
+                # Строки остатка подаются в executemany генератором, без копии хвоста списка
+                tail = islice(params, packed_end, None)
+                self.conn.executemany(row_sql, zip(*[tail] * _OHLCV_ROW_PARAMS))
+        # Границы покрытия берутся по ohlcv_data (уже с новыми строками) внутри самого upsert: это два спуска
+        # по первичному ключу, без проходов min()/max() по ts. Границы самой порции (ts[0], ts[-1] после
+        # сортировки) не подставляются: для пары без строки метаданных покрытие должно включать и старые строки
+        self.conn.execute(_SQL_UPSERT_METADATA, (symbol, timeframe, pair_id))
+
+    def _ensure_pair_id(self, symbol: str, timeframe: str) -> int:
+        """
+        Возвращает pair_id пары из ohlcv_pairs, при необходимости добавляя ее. Вызывается внутри транзакции
+        записи, поэтому id не кэшируется: при откате транзакции новая пара исчезает вместе с ним.
+        """
+        self.conn.execute(_SQL_PAIR_ID_INSERT, (symbol, timeframe))
+        return self.conn.execute(_SQL_PAIR_ID_LOOKUP, (symbol, timeframe)).fetchone()[0]
+
+    def _rows_per_insert(self) -> int:
+        """
+        Возвращает число строк в одном многострочном INSERT с учетом лимита параметров SQLite
+        (999 до версии 3.32, 32766 начиная с нее; Python 3.11+ сообщает точный лимит соединения).
+        """
+        limit = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+        getlimit = getattr(self.conn, 'getlimit', None)
+        if getlimit is not None:
+            limit = getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        return max(1, min(_ROWS_PER_INSERT, limit // _OHLCV_ROW_PARAMS))
+
     def delete_data(self, symbol: str, timeframe: str) -> bool:
         """
         Удаляет все данные и метаданные для указанного symbol и timeframe.
         """
+        return self._run_on_writer(self._delete_data, symbol, timeframe)
+
+    def _delete_data(self, symbol: str, timeframe: str) -> bool:
+        """
+        Реализация delete_data; выполняется в потоке записи.
+        """
         try:
-            self.cursor.execute('DELETE FROM ohlcv_data WHERE symbol=? AND timeframe=?', (symbol, timeframe))
-            self.cursor.execute('DELETE FROM ohlcv_metadata WHERE symbol=? AND timeframe=?', (symbol, timeframe))
+            # Оба удаления в одной транзакции: один commit и согласованные данные и метаданные
+            self._begin_write()
+            deleted_rows = self.conn.execute(_SQL_DELETE_PAIR_DATA, (symbol, timeframe)).rowcount
+            self.conn.execute(_SQL_DELETE_METADATA, (symbol, timeframe))
             self.conn.commit()
-            print(f"Данные для {symbol}/{timeframe} успешно удалены.")
+            self._invalidate_exists_cache()
+            print(f"Данные для {symbol}/{timeframe} успешно удалены (строк: {deleted_rows}).")
             return True
         except Exception as e:
+            self.conn.rollback()
             print(f"Ошибка при удалении данных для {symbol}/{timeframe}: {e}")
             return False
 
@@ -259,7 +928,8 @@ class GoogleDriveDataManager:
         symbol: str, 
         timeframe: str, 
         start_date: datetime, 
-        end_date: datetime
+        end_date: datetime,
+        return_range: bool = True
     ) -> Tuple[bool, Optional[Tuple[datetime, datetime]]]:
         """
         Проверяет наличие данных для указанного символа, таймфрейма и периода в БД на Google Drive.
@@ -268,37 +938,30 @@ class GoogleDriveDataManager:
             timeframe: Таймфрейм
             start_date: Дата начала периода
             end_date: Дата окончания периода
+            return_range: Возвращать доступный диапазон дат; False — только флаг (быстрее при массовых проверках)
         Returns:
             Tuple[bool, Optional[Tuple[datetime, datetime]]]: 
                 - bool: True, если данные существуют в БД на Google Drive, иначе False
-                - Optional[Tuple[datetime, datetime]]: Доступный диапазон дат, если данные существуют
+                - Optional[Tuple[datetime, datetime]]: Доступный диапазон дат, если данные существуют и return_range=True
         """
-        start_ms = self._timestamp_to_ms(start_date)
-        end_ms = self._timestamp_to_ms(end_date)
+        to_ms = self._timestamp_to_ms
+        start_ms = to_ms(start_date)
+        end_ms = to_ms(end_date)
+        cache_key = (symbol, timeframe, start_ms, end_ms, return_range)
+        with self._exists_cache_lock:
+            cached = self._exists_cache.get(cache_key)
+            if cached is not None:
+                self._exists_cache.move_to_end(cache_key)
+                return cached
+        # Длительность таймфрейма нужна только для запроса к БД, при попадании в кэш не вычисляется
+        duration_ms = self._get_timeframe_duration_ms(timeframe)
+        # Конец покрытия — закрытие последней сохраненной свечи
+        coverage_offset_ms = duration_ms - 1 if duration_ms else 0
         try:
-            self.cursor.execute(
-                'SELECT start_timestamp, end_timestamp FROM ohlcv_metadata WHERE symbol=? AND timeframe=?',
-                (symbol, timeframe)
-            )
-            result = self.cursor.fetchone()
-            if result:
-                meta_start_db, meta_end_db = result
-                duration_ms = self._get_timeframe_duration_ms(timeframe)
-                if duration_ms:
-                    actual_coverage_end_ms = meta_end_db + duration_ms - 1
-                else:
-                    actual_coverage_end_ms = meta_end_db
-                import time
-                now_ms = int(time.time() * 1000)
-                if end_ms > actual_coverage_end_ms:
-                    if abs(now_ms - actual_coverage_end_ms) < duration_ms * 2:
-                        return True, (self._ms_to_datetime(meta_start_db), self._ms_to_datetime(meta_end_db))
-                covers_full_period_meta = (meta_start_db <= start_ms and actual_coverage_end_ms >= end_ms)
-                if covers_full_period_meta:
-                    return True, (self._ms_to_datetime(meta_start_db), self._ms_to_datetime(meta_end_db))
-            else:
-                return False, None
-            return False, None
+            result = self._get_read_conn().execute(
+                _SQL_META_COVERAGE, (start_ms, coverage_offset_ms, end_ms, symbol, timeframe)
+            ).fetchone()
+            return self._coverage_result(cache_key, result, end_ms, duration_ms, return_range)
         except sqlite3.Error as e:
             print(f"Ошибка при проверке наличия данных в БД на Google Drive: {e}")
             return False, None
@@ -306,12 +969,173 @@ class GoogleDriveDataManager:
             print(f"Непредвиденная ошибка при проверке наличия данных в БД на Google Drive: {e}")
             return False, None
 
-    def get_data(
+    def check_data_exists_bulk(
+        self,
+        requests: List[Tuple[str, str, datetime, datetime]],
+        return_range: bool = True
+    ) -> Dict[Tuple[str, str, datetime, datetime], Tuple[bool, Optional[Tuple[datetime, datetime]]]]:
+        """
+        Проверяет наличие данных сразу для нескольких запросов (symbol, timeframe, start_date, end_date):
+        метаданные всех пар читаются одним запросом (на каждые _PAIRS_PER_QUERY пар) вместо отдельного
+        check_data_exists на каждый запрос. Правила покрытия и кэш те же, что у check_data_exists.
+        Args:
+            requests: Список запросов (symbol, timeframe, start_date, end_date)
+            return_range: Возвращать доступный диапазон дат; False — только флаги
+        Returns:
+            Dict[Tuple[str, str, datetime, datetime], Tuple[bool, Optional[Tuple[datetime, datetime]]]]:
+                Результат в формате check_data_exists для каждого запроса
+        """
+        results = {}
+        pending = []
+        for request in dict.fromkeys(requests):
+            symbol, timeframe, start_date, end_date = request
+            start_ms = self._timestamp_to_ms(start_date)
+            end_ms = self._timestamp_to_ms(end_date)
+            cache_key = (symbol, timeframe, start_ms, end_ms, return_range)
+            with self._exists_cache_lock:
+                cached = self._exists_cache.get(cache_key)
+                if cached is not None:
+                    self._exists_cache.move_to_end(cache_key)
+            if cached is not None:
+                results[request] = cached
+            else:
+                pending.append((request, cache_key))
+        if not pending:
+            return results
+        try:
+            pairs = list(dict.fromkeys((symbol, timeframe) for symbol, timeframe, _, _ in requests))
+            conn = self._get_read_conn()
+            metadata = {}
+            for offset in range(0, len(pairs), _PAIRS_PER_QUERY):
+                chunk = pairs[offset:offset + _PAIRS_PER_QUERY]
+                for symbol, timeframe, meta_start_db, meta_end_db in conn.execute(
+                    _pairs_sql(_SQL_META_MANY, len(chunk)), list(chain.from_iterable(chunk))
+                ):
+                    metadata[(symbol, timeframe)] = (meta_start_db, meta_end_db)
+        except sqlite3.Error as e:
+            print(f"Ошибка при проверке наличия данных в БД на Google Drive: {e}")
+            return {request: (False, None) for request in requests}
+        for request, cache_key in pending:
+            symbol, timeframe, start_ms, end_ms, _ = cache_key
+            duration_ms = self._get_timeframe_duration_ms(timeframe)
+            row = metadata.get((symbol, timeframe))
+            if row is not None:
+                meta_start_db, meta_end_db = row
+                # То же условие, что в _SQL_META_COVERAGE
+                covered = (
+                    meta_start_db is not None and meta_end_db is not None and
+                    meta_start_db <= start_ms and meta_end_db + (duration_ms - 1 if duration_ms else 0) >= end_ms
+                )
+                row = (meta_start_db, meta_end_db, covered)
+            results[request] = self._coverage_result(cache_key, row, end_ms, duration_ms, return_range)
+        return results
+
+    def _coverage_result(
+        self,
+        cache_key: Optional[tuple],
+        row: Optional[Tuple[int, int, bool]],
+        end_ms: int,
+        duration_ms: Optional[int],
+        return_range: bool
+    ) -> Tuple[bool, Optional[Tuple[datetime, datetime]]]:
+        """
+        Формирует ответ check_data_exists по строке метаданных (start_timestamp, end_timestamp, covered)
+        и сохраняет его в кэше (кроме ответов, зависящих от текущего времени; при cache_key=None не сохраняет).
+        """
+        if not row:
+            return self._remember_exists(cache_key, (False, None))
+        meta_start_db, meta_end_db, covered = row
+        stored_range = None
+        if return_range:
+            stored_range = (self._ms_to_datetime(meta_start_db), self._ms_to_datetime(meta_end_db))
+        if not covered and duration_ms:
+            # Последняя (еще не закрытая) свеча не считается пропуском. Ответ зависит от текущего
+            # времени, поэтому в кэш не попадает
+            actual_coverage_end_ms = meta_end_db + duration_ms - 1
+            now_ms = time.time_ns() // 1_000_000
+            if end_ms > actual_coverage_end_ms and abs(now_ms - actual_coverage_end_ms) < duration_ms * 2:
+                return True, stored_range
+        if not covered:
+            return self._remember_exists(cache_key, (False, None))
+        return self._remember_exists(cache_key, (True, stored_range))
+
+    def _remember_exists(
+        self,
+        key: Optional[tuple],
+        result: Tuple[bool, Optional[Tuple[datetime, datetime]]]
+    ) -> Tuple[bool, Optional[Tuple[datetime, datetime]]]:
+        """
+        Сохраняет результат check_data_exists в LRU-кэше (не более _EXISTS_CACHE_SIZE записей) и возвращает его.
+        """
+        if key is None:
+            return result
+        with self._exists_cache_lock:
+            self._exists_cache[key] = result
+            self._exists_cache.move_to_end(key)
+            while len(self._exists_cache) > _EXISTS_CACHE_SIZE:
+                self._exists_cache.popitem(last=False)
+        return result
+
+    def _invalidate_exists_cache(self) -> None:
+        """
+        Сбрасывает кэш check_data_exists; вызывается после каждой успешной записи или удаления.
+        """
+        with self._exists_cache_lock:
+            self._exists_cache.clear()
+
+    def get_missing_ranges(
         self, 
         symbol: str, 
         timeframe: str, 
         start_date: datetime, 
         end_date: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Определяет диапазоны, которых не хватает в БД на Google Drive для покрытия запрошенного периода.
+        Метаданные хранят только границы сохраненных данных, поэтому недостающие диапазоны
+        примыкают к уже сохраненным, чтобы после их загрузки данные оставались непрерывными.
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            start_date: Дата начала периода
+            end_date: Дата окончания периода
+        Returns:
+            List[Tuple[datetime, datetime]]: Недостающие диапазоны (пустой список, если период полностью покрыт)
+        """
+        start_ms = self._timestamp_to_ms(start_date)
+        end_ms = self._timestamp_to_ms(end_date)
+        try:
+            result = self._get_read_conn().execute(_SQL_META_LOOKUP, (symbol, timeframe)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Ошибка при проверке наличия данных в БД на Google Drive: {e}")
+            result = None
+        if not result:
+            return [(start_date, end_date)]
+        meta_start_db, meta_end_db = result
+        duration_ms = self._get_timeframe_duration_ms(timeframe)
+        if duration_ms:
+            actual_coverage_end_ms = meta_end_db + duration_ms - 1
+        else:
+            actual_coverage_end_ms = meta_end_db
+        missing_ranges = []
+        if start_ms < meta_start_db:
+            missing_ranges.append((start_date, self._ms_to_datetime(meta_start_db - 1)))
+        if end_ms > actual_coverage_end_ms:
+            now_ms = time.time_ns() // 1_000_000
+            # Последняя (еще не закрытая) свеча не считается пропуском
+            if not (duration_ms and abs(now_ms - actual_coverage_end_ms) < duration_ms * 2):
+                missing_ranges.append((self._ms_to_datetime(actual_coverage_end_ms + 1), end_date))
+        return missing_ranges
+
+    def get_data(
+        self, 
+        symbol: str, 
+        timeframe: str, 
+        start_date: datetime, 
+        end_date: datetime,
+        as_int_timestamp: bool = False,
+        chunksize: Optional[int] = None,
+        dtype_backend: str = 'numpy'
     ) -> pd.DataFrame:
         """
         Получает данные из базы данных на Google Drive для указанного символа, таймфрейма и периода.
@@ -320,24 +1144,24 @@ class GoogleDriveDataManager:
             timeframe: Таймфрейм
             start_date: Дата начала периода
             end_date: Дата окончания периода
+            as_int_timestamp: Вернуть индекс timestamp как int64 (миллисекунды) без преобразования в datetime
+            chunksize: Размер порции fetchmany (по умолчанию _FETCH_BATCH_ROWS); при заданном значении
+                чтение всегда идет через sqlite3, а не через ADBC
+            dtype_backend: 'numpy' (float64) или 'pyarrow' — колонки OHLCV типа double[pyarrow]; при чтении
+                через ADBC они ссылаются на буферы Arrow без копирования и передаются в polars/duckdb
+                без преобразования. Индекс timestamp в обоих случаях одинаковый
         Returns:
             pd.DataFrame: DataFrame с OHLCV данными
         """
+        if dtype_backend not in ('numpy', 'pyarrow'):
+            raise ValueError(f"dtype_backend должен быть 'numpy' или 'pyarrow', получено: {dtype_backend}")
         try:
             start_ms = self._timestamp_to_ms(start_date)
             end_ms = self._timestamp_to_ms(end_date)
-            self.cursor.execute(
-                'SELECT * FROM ohlcv_data WHERE symbol=? AND timeframe=? AND timestamp>=? AND timestamp<=? ORDER BY timestamp ASC',
-                (symbol, timeframe, start_ms, end_ms)
+            return self._read_pair(
+                symbol, timeframe, start_ms, end_ms, as_int_timestamp, chunksize, allow_arrow=not chunksize,
+                arrow_dtypes=dtype_backend == 'pyarrow'
             )
-            rows = self.cursor.fetchall()
-            if not rows:
-                return pd.DataFrame()
-            columns = ['timestamp', 'symbol', 'timeframe', 'open', 'high', 'low', 'close', 'volume']
-            df = pd.DataFrame(rows, columns=columns)
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            return df
         except sqlite3.Error as e:
             print(f"Ошибка при получении данных из БД на Google Drive: {e}")
             return pd.DataFrame()
@@ -345,29 +1169,448 @@ class GoogleDriveDataManager:
             print(f"Непредвиденная ошибка при получении данных из БД на Google Drive: {e}")
             return pd.DataFrame()
 
-    def get_stored_info(self) -> pd.DataFrame:
+    def get_data_iter(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_date: datetime,
+        end_date: datetime,
+        chunksize: int = _ITER_CHUNK_ROWS,
+        as_int_timestamp: bool = False
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Читает данные за период частями: генератор возвращает DataFrame в формате get_data не более чем
+        по chunksize строк в порядке timestamp. В памяти одновременно находится одна часть, поэтому
+        многолетние минутные данные можно обрабатывать без загрузки всего диапазона.
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            start_date: Дата начала периода
+            end_date: Дата окончания периода
+            chunksize: Максимальное число строк в одном DataFrame
+            as_int_timestamp: Вернуть индекс timestamp как int64 (миллисекунды) без преобразования в datetime
+        Returns:
+            Iterator[pd.DataFrame]: Части данных (ничего, если данных нет)
+        """
+        cursor = None
+        try:
+            params = (symbol, timeframe, self._timestamp_to_ms(start_date), self._timestamp_to_ms(end_date))
+            cursor = self._get_read_conn().execute(_SQL_GET_DATA, params)
+            while True:
+                batch = cursor.fetchmany(chunksize)
+                if not batch:
+                    break
+                df = self._ohlcv_frame(np.array(batch, dtype=np.float64), as_int_timestamp)
+                del batch
+                df.insert(0, 'symbol', symbol)
+                df.insert(1, 'timeframe', timeframe)
+                yield df
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении данных из БД на Google Drive: {e}")
+        finally:
+            # Курсор закрывается и при досрочном прекращении перебора, чтобы не удерживать снимок чтения
+            if cursor is not None:
+                cursor.close()
+
+    def get_data_if_cached(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_date: datetime,
+        end_date: datetime,
+        as_int_timestamp: bool = False
+    ) -> Tuple[bool, Optional[pd.DataFrame]]:
+        """
+        Проверяет покрытие периода (как check_data_exists) и, если период покрыт, сразу читает данные
+        (как get_data). Оба запроса выполняются в одной транзакции чтения на соединении потока чтения:
+        метаданные и свечи берутся из одного снимка БД, и запись между проверкой и чтением их не разведет.
+        Кэш check_data_exists не используется и не пополняется: его ответ мог быть получен до снимка.
+        Если доступно только основное соединение потока записи, транзакция не открывается и запросы
+        выполняются по отдельности.
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            start_date: Дата начала периода
+            end_date: Дата окончания периода
+            as_int_timestamp: Вернуть индекс timestamp как int64 (миллисекунды) без преобразования в datetime
+        Returns:
+            Tuple[bool, Optional[pd.DataFrame]]:
+                - bool: True, если период покрыт данными в БД на Google Drive
+                - Optional[pd.DataFrame]: Данные в формате get_data, если период покрыт, иначе None
+        """
+        conn = self._get_read_conn()
+        # Основное соединение (запасной вариант) принадлежит потоку записи: транзакцию на нем не открываем
+        snapshot = conn is not self.conn and not conn.in_transaction
+        try:
+            if snapshot:
+                conn.execute('BEGIN')
+            start_ms = self._timestamp_to_ms(start_date)
+            end_ms = self._timestamp_to_ms(end_date)
+            duration_ms = self._get_timeframe_duration_ms(timeframe)
+            coverage_offset_ms = duration_ms - 1 if duration_ms else 0
+            row = conn.execute(
+                _SQL_META_COVERAGE, (start_ms, coverage_offset_ms, end_ms, symbol, timeframe)
+            ).fetchone()
+            covered, _ = self._coverage_result(None, row, end_ms, duration_ms, return_range=False)
+            if not covered:
+                return False, None
+            # ADBC читает через собственное соединение, вне снимка, поэтому здесь используется sqlite3
+            df = self._read_pair(
+                symbol, timeframe, start_ms, end_ms, as_int_timestamp, None, allow_arrow=False
+            )
+            return True, df
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении данных из БД на Google Drive: {e}")
+            return False, None
+        except Exception as e:
+            print(f"Непредвиденная ошибка при получении данных из БД на Google Drive: {e}")
+            return False, None
+        finally:
+            if snapshot and conn.in_transaction:
+                conn.commit()
+
+    def _read_pair(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_ms: int,
+        end_ms: int,
+        as_int_timestamp: bool,
+        chunksize: Optional[int],
+        allow_arrow: bool,
+        arrow_dtypes: bool = False
+    ) -> pd.DataFrame:
+        """
+        Читает диапазон свечей пары (через ADBC, если он установлен и разрешен, иначе через sqlite3)
+        и добавляет колонки symbol и timeframe.
+        Returns:
+            pd.DataFrame: DataFrame в формате get_data (пустой, если строк нет)
+        """
+        df = None
+        if adbc_sqlite is not None and allow_arrow:
+            # Если установлен ADBC-драйвер, колонки приходят буферами Arrow без кортежей Python
+            df = self._read_range_arrow(symbol, timeframe, start_ms, end_ms, as_int_timestamp, arrow_dtypes)
+        if df is None:
+            # symbol и timeframe постоянны и не читаются из БД
+            df = self._read_range_numpy(
+                symbol, timeframe, start_ms, end_ms, as_int_timestamp, chunksize or _FETCH_BATCH_ROWS
+            )
+            if arrow_dtypes and not df.empty:
+                df = df.astype(dict.fromkeys(_OHLCV_READ_DTYPES, _ARROW_OHLCV_DTYPE))
+        if df.empty:
+            return pd.DataFrame()
+        df.insert(0, 'symbol', symbol)
+        df.insert(1, 'timeframe', timeframe)
+        return df
+
+    def get_data_many(
+        self,
+        pairs: List[Tuple[str, str]],
+        start_date: datetime,
+        end_date: datetime,
+        as_int_timestamp: bool = False
+    ) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """
+        Получает данные сразу для нескольких пар (symbol, timeframe) за один период одним запросом
+        (на каждые _PAIRS_PER_QUERY пар) вместо отдельного get_data на каждую пару.
+        Args:
+            pairs: Список пар (symbol, timeframe)
+            start_date: Дата начала периода
+            end_date: Дата окончания периода
+            as_int_timestamp: Вернуть индекс timestamp как int64 (миллисекунды) без преобразования в datetime
+        Returns:
+            Dict[Tuple[str, str], pd.DataFrame]: DataFrame в формате get_data для каждой пары
+                (пустой DataFrame, если данных нет; при ошибке чтения пустые DataFrame для всех пар)
+        """
+        pairs = list(dict.fromkeys(pairs))
+        result = {pair: pd.DataFrame() for pair in pairs}
+        try:
+            start_ms = self._timestamp_to_ms(start_date)
+            end_ms = self._timestamp_to_ms(end_date)
+            conn = self._get_read_conn()
+            for offset in range(0, len(pairs), _PAIRS_PER_QUERY):
+                chunk = pairs[offset:offset + _PAIRS_PER_QUERY]
+                pair_params = list(chain.from_iterable(chunk))
+                names = {
+                    pair_id: (symbol, timeframe)
+                    for pair_id, symbol, timeframe in conn.execute(
+                        _pairs_sql(_SQL_PAIR_IDS_MANY, len(chunk)), pair_params
+                    )
+                }
+                if not names:
+                    continue
+                values = self._fetch_float_rows(
+                    _pairs_sql(_SQL_GET_DATA_MANY, len(chunk)), (*pair_params, start_ms, end_ms)
+                )
+                if not len(values):
+                    continue
+                # Строки упорядочены по pair_id: границы пар — места смены pair_id
+                pair_ids = values[:, 0].astype(np.int64)
+                bounds = [0, *(np.flatnonzero(pair_ids[1:] != pair_ids[:-1]) + 1).tolist(), len(values)]
+                for start, stop in zip(bounds[:-1], bounds[1:]):
+                    symbol, timeframe = names[int(pair_ids[start])]
+                    df = self._ohlcv_frame(values[start:stop, 1:], as_int_timestamp)
+                    df.insert(0, 'symbol', symbol)
+                    df.insert(1, 'timeframe', timeframe)
+                    result[(symbol, timeframe)] = df
+            return result
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении данных из БД на Google Drive: {e}")
+            return {pair: pd.DataFrame() for pair in pairs}
+        except Exception as e:
+            print(f"Непредвиденная ошибка при получении данных из БД на Google Drive: {e}")
+            return {pair: pd.DataFrame() for pair in pairs}
+
+    def export_parquet(self, symbol: str, timeframe: str, path: Optional[str] = None) -> Optional[str]:
+        """
+        Выгружает все сохраненные свечи пары в файл Parquet (колоночный формат со сжатием zstd) для аналитики.
+        Источником данных остается SQLite: файл — снимок на момент выгрузки, повторный вызов его перезаписывает.
+        Требуется pyarrow (pip install pyarrow).
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            path: Путь к файлу (по умолчанию parquet/{symbol}_{timeframe}.parquet рядом с БД)
+        Returns:
+            Optional[str]: Путь к записанному файлу или None, если данных нет или выгрузка не удалась
+        """
+        df = self.get_data(symbol, timeframe, _MIN_TIMESTAMP_MS, _MAX_TIMESTAMP_MS)
+        if df.empty:
+            print(f"Нет данных для выгрузки в Parquet для {symbol}/{timeframe}.")
+            return None
+        if path is None:
+            path = os.path.join(self.db_directory, 'parquet', f"{symbol}_{timeframe}.parquet")
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            df.to_parquet(path, engine='pyarrow', compression='zstd')
+        except ImportError:
+            print("Для выгрузки в Parquet требуется pyarrow (pip install pyarrow).")
+            return None
+        except Exception as e:
+            print(f"Ошибка при выгрузке {symbol}/{timeframe} в Parquet: {e}")
+            return None
+        print(f"Данные {symbol}/{timeframe} выгружены в Parquet: {path} (строк: {len(df)}).")
+        return path
+
+    def export_parquet_dataset(
+        self,
+        pairs: Optional[List[Tuple[str, str]]] = None,
+        root: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Выгружает свечи в набор Parquet с разбиением в стиле Hive:
+        {root}/symbol={symbol}/timeframe={timeframe}/year={year}/data.parquet (zstd). Набор читается
+        pyarrow.dataset.dataset(root, partitioning='hive') или pd.read_parquet(root, filters=[...]) и позволяет
+        читать только нужные пары и годы. Запись — несколько больших последовательных файлов, что
+        для Google Drive дешевле случайной записи в B-дерево; источником данных остается SQLite, повторная
+        выгрузка перезаписывает файлы. Требуется pyarrow (pip install pyarrow).
+        Args:
+            pairs: Список пар (symbol, timeframe); по умолчанию — все пары из метаданных
+            root: Корневая директория набора (по умолчанию parquet_dataset рядом с БД)
+        Returns:
+            Optional[str]: Корневая директория набора или None, если выгрузка не удалась
+        """
+        if pairs is None:
+            pairs = self._get_read_conn().execute('SELECT symbol, timeframe FROM ohlcv_metadata').fetchall()
+        if root is None:
+            root = os.path.join(self.db_directory, 'parquet_dataset')
+        files = 0
+        for symbol, timeframe in pairs:
+            df = self.get_data(symbol, timeframe, _MIN_TIMESTAMP_MS, _MAX_TIMESTAMP_MS)
+            if df.empty:
+                continue
+            # symbol и timeframe задаются путем раздела и в файлах не повторяются.
+            # Индекс упорядочен, поэтому границы лет находятся двоичным поиском, без группировки
+            df = df.drop(columns=['symbol', 'timeframe'])
+            years = df.index.year
+            first_year, last_year = int(years[0]), int(years[-1])
+            bounds = np.searchsorted(years, np.arange(first_year, last_year + 2))
+            try:
+                for year, start, stop in zip(range(first_year, last_year + 1), bounds[:-1], bounds[1:]):
+                    if start == stop:
+                        continue
+                    directory = os.path.join(root, f"symbol={symbol}", f"timeframe={timeframe}", f"year={year}")
+                    os.makedirs(directory, exist_ok=True)
+                    df.iloc[start:stop].to_parquet(
+                        os.path.join(directory, 'data.parquet'), engine='pyarrow', compression='zstd'
+                    )
+                    files += 1
+            except ImportError:
+                print("Для выгрузки в Parquet требуется pyarrow (pip install pyarrow).")
+                return None
+            except Exception as e:
+                print(f"Ошибка при выгрузке {symbol}/{timeframe} в Parquet: {e}")
+                return None
+        print(f"Данные выгружены в набор Parquet: {root} (файлов: {files}).")
+        return root
+
+    def _read_range_numpy(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_ms: int,
+        end_ms: int,
+        as_int_timestamp: bool,
+        batch_rows: int
+    ) -> pd.DataFrame:
+        """
+        Читает диапазон свечей через sqlite3 порциями fetchmany; каждая порция сразу переводится в массив NumPy,
+        и массивы склеиваются один раз в конце. Диапазон читается одним запросом, без предварительного COUNT(*):
+        ohlcv_data — таблица WITHOUT ROWID, и подсчет прошел бы по тем же страницам, что и сама выборка.
+        В памяти одновременно находится одна порция кортежей, а не весь результат списком Python.
+        Returns:
+            pd.DataFrame: OHLCV с индексом timestamp (пустой, если строк нет)
+        """
+        cursor = self._get_read_conn().execute(_SQL_GET_DATA, (symbol, timeframe, start_ms, end_ms))
+        batches = []
+        while True:
+            batch = cursor.fetchmany(batch_rows)
+            if not batch:
+                break
+            # Миллисекунды (< 2**53) представимы в float64 без потерь, поэтому все 6 колонок идут в один массив
+            batches.append(np.array(batch, dtype=np.float64))
+        if not batches:
+            return pd.DataFrame()
+        values = batches[0] if len(batches) == 1 else np.concatenate(batches)
+        return self._ohlcv_frame(values, as_int_timestamp)
+
+    def _fetch_float_rows(self, sql: str, params: Tuple[Any, ...]) -> np.ndarray:
+        """
+        Выполняет запрос с числовыми колонками и возвращает результат массивом float64 (строки × колонки).
+        Через ADBC (если установлен) колонки приходят буферами Arrow; иначе sqlite3 читает порциями fetchmany,
+        и каждая порция сразу переводится в массив, без общего списка кортежей.
+        """
+        conn = self._get_arrow_conn() if adbc_sqlite is not None else None
+        if conn is not None:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                table = cursor.fetch_arrow_table()
+            finally:
+                cursor.close()
+            return np.column_stack(
+                [column.to_numpy().astype(np.float64, copy=False) for column in table.columns]
+            ) if table.num_rows else np.empty((0, table.num_columns), dtype=np.float64)
+        cursor = self._get_read_conn().execute(sql, params)
+        batches = []
+        while True:
+            batch = cursor.fetchmany(_FETCH_BATCH_ROWS)
+            if not batch:
+                break
+            batches.append(np.array(batch, dtype=np.float64))
+        if not batches:
+            return np.empty((0, len(cursor.description)), dtype=np.float64)
+        return batches[0] if len(batches) == 1 else np.concatenate(batches)
+
+    def _ohlcv_frame(self, values: np.ndarray, as_int_timestamp: bool) -> pd.DataFrame:
+        """
+        Собирает DataFrame OHLCV из массива float64 с колонками timestamp, open, high, low, close, volume
+        (колонки DataFrame — представления массива, без копирования).
+        Returns:
+            pd.DataFrame: OHLCV с индексом timestamp
+        """
+        # Миллисекунды (< 2**53) представимы в float64 без потерь
+        timestamps = values[:, 0].astype(np.int64)
+        index = pd.Index(timestamps, name='timestamp') if as_int_timestamp else pd.DatetimeIndex(
+            timestamps.astype('datetime64[ms]'), name='timestamp'
+        )
+        return pd.DataFrame(
+            {column: values[:, position] for position, column in enumerate(_OHLCV_READ_DTYPES, start=1)},
+            index=index,
+            copy=False
+        )
+
+    def _get_arrow_conn(self) -> Optional[Any]:
+        """
+        Возвращает ADBC-соединение (только чтение) текущего потока, открывая его при первом обращении.
+        Returns:
+            Optional[Any]: Соединение ADBC или None, если открыть его не удалось или менеджер закрыт
+        """
+        if self._closed:
+            return None
+        conn = getattr(self._tls, 'arrow_conn', None)
+        if conn is None:
+            try:
+                conn = adbc_sqlite.connect(f"{Path(self.db_path).resolve().as_uri()}?mode=ro", autocommit=True)
+            except Exception as e:
+                logger.debug("ADBC-соединение недоступно, используется sqlite3: %s", e)
+                return None
+            self._tls.arrow_conn = conn
+            with self._read_conns_lock:
+                self._read_conns.append(conn)
+        return conn
+
+    def _read_range_arrow(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_ms: int,
+        end_ms: int,
+        as_int_timestamp: bool,
+        arrow_dtypes: bool = False
+    ) -> Optional[pd.DataFrame]:
+        """
+        Читает диапазон свечей через ADBC-драйвер SQLite сразу в таблицу Arrow.
+        Соединение ADBC (только чтение) открывается одно на поток, как и соединения sqlite3.
+        При arrow_dtypes колонки OHLCV остаются массивами Arrow (double[pyarrow]), иначе переводятся в NumPy.
+        Returns:
+            Optional[pd.DataFrame]: OHLCV с индексом timestamp либо None, если ADBC использовать не удалось
+        """
+        conn = self._get_arrow_conn()
+        if conn is None:
+            return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute(_SQL_GET_DATA, (symbol, timeframe, start_ms, end_ms))
+            table = cursor.fetch_arrow_table()
+        finally:
+            cursor.close()
+        if not table.num_rows:
+            return pd.DataFrame()
+        # Колонки без NULL из одного буфера Arrow переходят в NumPy без копирования; метки времени
+        # int64 (мс) становятся datetime64[ms] через представление того же буфера, без pd.to_datetime
+        timestamps = table.column('timestamp').to_numpy().astype(np.int64, copy=False)
+        index = pd.Index(timestamps, name='timestamp') if as_int_timestamp else pd.DatetimeIndex(
+            timestamps.view('datetime64[ms]'), name='timestamp'
+        )
+        if arrow_dtypes:
+            columns = {
+                column: pd.arrays.ArrowExtensionArray(table.column(column)).astype(_ARROW_OHLCV_DTYPE, copy=False)
+                for column in _OHLCV_READ_DTYPES
+            }
+        else:
+            columns = {
+                column: table.column(column).to_numpy().astype(np.float64, copy=False)
+                for column in _OHLCV_READ_DTYPES
+            }
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def get_stored_info(self, as_datetime: bool = True) -> pd.DataFrame:
         """
         Получает информацию о всех сохраненных данных в БД на Google Drive.
         Также проверяет типы timestamp и предупреждает, если есть некорректные типы.
+        Args:
+            as_datetime: Добавить колонки start_date/end_date (False — только границы в миллисекундах)
         Returns:
             pd.DataFrame: DataFrame с информацией о сохраненных данных
         """
         try:
-            self.cursor.execute('SELECT * FROM ohlcv_metadata')
-            rows = self.cursor.fetchall()
+            read_conn = self._get_read_conn()
+            rows = read_conn.execute('SELECT * FROM ohlcv_metadata').fetchall()
             if not rows:
                 print("В БД на Google Drive нет сохраненных данных.")
                 return pd.DataFrame()
             columns = ['symbol', 'timeframe', 'start_timestamp', 'end_timestamp']
             df = pd.DataFrame(rows, columns=columns)
-            df['start_date'] = pd.to_datetime(df['start_timestamp'], unit='ms')
-            df['end_date'] = pd.to_datetime(df['end_timestamp'], unit='ms')
-            df = df[['symbol', 'timeframe', 'start_date', 'end_date', 'start_timestamp', 'end_timestamp']]
-            self.cursor.execute("SELECT DISTINCT typeof(timestamp) FROM ohlcv_data LIMIT 10;")
-            types = self.cursor.fetchall()
-            if types and any(t[0] != 'integer' for t in types):
-                print(f"❌ ВНИМАНИЕ: В таблице ohlcv_data обнаружены некорректные типы timestamp: {types}. Рекомендуется пересоздать таблицу.")
-            # print("✅ Все значения timestamp в ohlcv_data имеют тип integer.")
+            if as_datetime:
+                df.insert(2, 'start_date', pd.to_datetime(df['start_timestamp'], unit='ms'))
+                df.insert(3, 'end_date', pd.to_datetime(df['end_timestamp'], unit='ms'))
+            # В таблице STRICT тип timestamp гарантирует сама SQLite; проверка типов требует просмотра
+            # всех строк ohlcv_data, поэтому выполняется только для таблиц без STRICT
+            row = read_conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='ohlcv_data'").fetchone()
+            if row and row[0] and 'STRICT' not in row[0].upper():
+                types = read_conn.execute("SELECT DISTINCT typeof(timestamp) FROM ohlcv_data LIMIT 10;").fetchall()
+                if types and any(t[0] != 'integer' for t in types):
+                    print(f"❌ ВНИМАНИЕ: В таблице ohlcv_data обнаружены некорректные типы timestamp: {types}. Рекомендуется пересоздать таблицу.")
             return df
         except sqlite3.Error as e:
             print(f"Ошибка при получении информации о сохраненных данных в БД на Google Drive: {e}")
@@ -378,22 +1621,37 @@ class GoogleDriveDataManager:
 
     def close(self):
         """
-        Закрывает соединение с базой данных.
+        Закрывает соединение с базой данных и соединения для чтения всех потоков.
+        Перед закрытием дожидается завершения поставленных в очередь записей и выполняет PRAGMA optimize.
+        Повторный вызов ничего не делает; чтение и запись после закрытия не выполняются.
         """
+        if self._closed:
+            return
+        self._closed = True
+        self._write_executor.shutdown(wait=True)
+        with self._read_conns_lock:
+            for read_conn in self._read_conns:
+                read_conn.close()
+            self._read_conns.clear()
+        self._tls = threading.local()
         if self.conn:
+            # Рекомендация SQLite перед закрытием долгоживущего соединения
+            self._optimize()
             self.conn.close()
             print("Соединение с БД на Google Drive закрыто.")
 
-    def debug_print_ohlcv_data(self, symbol, timeframe, limit=10):
+    def debug_print_ohlcv_data(self, symbol: str, timeframe: str, limit: int = 10):
+        """
+        Выводит первые строки ohlcv_data для заданного symbol/timeframe.
+        Первичный ключ (pair_id, timestamp) уже упорядочен, поэтому ORDER BY ... LIMIT
+        читает только limit строк без сортировки; symbol и timeframe известны и из БД не читаются.
+        """
         print(f"Первые {limit} строк для {symbol}/{timeframe}:")
-        self.cursor.execute(
-            "SELECT timestamp, symbol, timeframe FROM ohlcv_data WHERE symbol=? AND timeframe=? ORDER BY timestamp ASC LIMIT ?",
-            (symbol, timeframe, limit)
-        )
-        rows = self.cursor.fetchall()
-        for row in rows:
-            ts, sym, tf = row
-            print(f"timestamp={ts} ({pd.to_datetime(ts, unit='ms')}), symbol={sym}, timeframe={tf}")
+        rows = self._get_read_conn().execute(_SQL_FIRST_TIMESTAMPS, (symbol, timeframe, limit)).fetchmany(limit)
+        # Все метки переводятся в даты одним векторным вызовом
+        dates = pd.to_datetime([row[0] for row in rows], unit='ms')
+        for (ts, _), dt in zip(rows, dates):
+            print(f"timestamp={ts} ({dt}), symbol={symbol}, timeframe={timeframe}")
 
     def debug_check_timestamps(self, symbol: str, timeframe: str, limit: int = 5):
         """
@@ -401,16 +1659,29 @@ class GoogleDriveDataManager:
         Выводит типы, значения и результат преобразования в дату.
         """
         print(f"Проверка первых {limit} строк для {symbol}/{timeframe} в ohlcv_data:")
-        self.cursor.execute(
-            "SELECT timestamp, typeof(timestamp), symbol, timeframe FROM ohlcv_data WHERE symbol=? AND timeframe=? ORDER BY timestamp ASC LIMIT ?",
-            (symbol, timeframe, limit)
-        )
-        rows = self.cursor.fetchall()
-        for ts, ttype, sym, tf in rows:
+        rows = self._get_read_conn().execute(_SQL_FIRST_TIMESTAMPS, (symbol, timeframe, limit)).fetchmany(limit)
+        for ts, ttype in rows:
             try:
-                dt = pd.to_datetime(ts, unit='ms') if ttype == 'integer' else None
-                print(f"timestamp={ts} (type={ttype}) -> {dt}, symbol={sym}, timeframe={tf}")
+                dt = self._ms_to_datetime(ts) if ttype == 'integer' else None
+                print(f"timestamp={ts} (type={ttype}) -> {dt}, symbol={symbol}, timeframe={timeframe}")
             except Exception as e:
                 print(f"❌ Ошибка преобразования timestamp={ts} (type={ttype}): {e}")
         if not rows:
-            print("Нет данных для указанного symbol/timeframe.")
\ No newline at end of file
+            print("Нет данных для указанного symbol/timeframe.")
+
+    def debug_query_plans(self, symbol: str, timeframe: str) -> None:
+        """
+        Выводит EXPLAIN QUERY PLAN основных запросов чтения для заданного symbol/timeframe.
+        Чтение диапазона должно идти поиском по первичному ключу (SEARCH ... USING PRIMARY KEY) без
+        USE TEMP B-TREE FOR ORDER BY: ORDER BY в запросах совпадает с порядком ключа и сортировки не требует.
+        План зависит от версии SQLite, поэтому его удобно проверить в конкретной среде (например, в Colab).
+        """
+        queries = (
+            ('get_data', _SQL_GET_DATA, (symbol, timeframe, _MIN_TIMESTAMP_MS, _MAX_TIMESTAMP_MS)),
+            ('check_data_exists', _SQL_META_LOOKUP, (symbol, timeframe)),
+        )
+        conn = self._get_read_conn()
+        for name, sql, params in queries:
+            plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+            marker = '❌' if any('TEMP B-TREE' in step or step.startswith('SCAN ohlcv_data') for step in plan) else '✅'
+            print(f"{marker} {name}: {'; '.join(plan)}")
\ No newline at end of file